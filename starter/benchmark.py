@@ -0,0 +1,247 @@
+"""
+Benchmarks for every puzzle type and solver, reported as JSON so runs
+on different commits can be compared.
+
+Run from this directory:
+
+    python benchmark.py [--repeats N] [--warmup N] [--only TEXT] [-o FILE]
+
+Each case runs in a fresh process, so its peak_rss_kb is its own.
+"""
+from puzzle_tools import depth_first_solve, breadth_first_solve, \
+    astar_solve, ida_star_solve, SearchStats
+from mn_puzzle import MNPuzzle, manhattan_distance, linear_conflict
+from sudoku_puzzle import SudokuPuzzle, propagation_solve, exact_cover_solve
+from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle, \
+    peg_solitaire_solve
+from word_ladder_puzzle import WordLadderPuzzle, bidirectional_solve
+from word_graph import load_word_graph
+from time import perf_counter
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import subprocess
+import sys
+
+
+# the sudokus from sudoku_puzzle.py's __main__
+SUDOKUS = {
+    "star_2015_07_09": ["***7*8*1*", "**7*9***6", "9*31*****",
+                        "35*8**6*1", "*********", "1*6**9*48",
+                        "*****12*7", "8***7*4**", "*6*3*2***"],
+    "3_star_2015_11_14": ["***9*2***", "*91***63*", "*3**7**8*",
+                          "3*******8", "**9***2**", "5*******7",
+                          "*7**8**4*", "*45***81*", "***3*6***"],
+    "4_star_2015_11_14": ["56***7**9", "*7**48*31", "*********",
+                          "43*******", "*8*****9*", "*******26",
+                          "*********", "19*36**7*", "7**1***42"],
+}
+
+PEG_5X5 = ["*****", "*****", "*****", "**.**", "*****"]
+
+# (rows, columns, scramble moves, seed) of the sliding-tile scrambles
+MN_SCRAMBLES = [(3, 3, 40, 1), (3, 3, 60, 2), (3, 3, 200, 3),
+                (4, 4, 40, 4), (4, 4, 80, 5)]
+
+WORD_LADDERS = [("same", "cost"), ("cold", "warm"), ("head", "tail"),
+                ("stone", "money")]
+
+
+def sudoku(name):
+    """
+    Return the SudokuPuzzle called name in SUDOKUS.
+
+    @type name: str
+    @rtype: SudokuPuzzle
+    """
+    return SudokuPuzzle(9, [list(row) for row in SUDOKUS[name]],
+                        set("123456789"))
+
+
+def scramble(rows, columns, moves, seed):
+    """
+    Return an MNPuzzle whose target is the tiles in order, starting
+    from that target shuffled by moves random slides.
+
+    @type rows: int
+    @type columns: int
+    @type moves: int
+    @type seed: int
+    @rtype: MNPuzzle
+    """
+    symbols = [str(i) for i in range(1, rows * columns)] + ["*"]
+    target = tuple(tuple(symbols[r * columns:(r + 1) * columns])
+                   for r in range(rows))
+    rng = random.Random(seed)
+    puzzle = MNPuzzle(target, target)
+    for _ in range(moves):
+        puzzle = rng.choice(list(puzzle.extensions()))
+    return puzzle
+
+
+def cases():
+    """
+    Return the benchmark cases as (name, setup, solve, collects), where
+    setup() returns the puzzle to solve and solve(puzzle, stats) solves
+    it, collecting stats if collects.
+
+    @rtype: list[(str, () -> Puzzle, (Puzzle, SearchStats) -> object,
+                  bool)]
+    """
+    found = []
+
+    def add(name, setup, solve, collects=False):
+        found.append((name, setup, solve, collects))
+
+    for name in SUDOKUS:
+        setup = lambda name=name: sudoku(name)
+        add("sudoku/{}/depth_first".format(name), setup,
+            lambda p, s: depth_first_solve(p, stats=s), True)
+        add("sudoku/{}/propagation".format(name), setup,
+            lambda p, s: propagation_solve(p))
+        add("sudoku/{}/exact_cover".format(name), setup,
+            lambda p, s: exact_cover_solve(p))
+
+    setup = lambda: GridPegSolitairePuzzle([list(r) for r in PEG_5X5],
+                                           {"*", ".", "#"})
+    add("peg/5x5/depth_first", setup,
+        lambda p, s: depth_first_solve(p, stats=s), True)
+    add("peg/5x5/peg_solitaire", setup, lambda p, s: peg_solitaire_solve(p))
+
+    for rows, columns, moves, seed in MN_SCRAMBLES:
+        setup = lambda a=(rows, columns, moves, seed): scramble(*a)
+        name = "mn/{}x{}/{}_moves_seed_{}".format(rows, columns, moves, seed)
+        if rows * columns <= 9:
+            add(name + "/breadth_first", setup,
+                lambda p, s: breadth_first_solve(p, stats=s), True)
+        add(name + "/astar_manhattan", setup,
+            lambda p, s: astar_solve(p, manhattan_distance, stats=s), True)
+        add(name + "/astar_linear_conflict", setup,
+            lambda p, s: astar_solve(p, linear_conflict, stats=s), True)
+        add(name + "/ida_star", setup,
+            lambda p, s: ida_star_solve(p, stats=s), True)
+
+    words = {}
+
+    def word_set():
+        if "set" not in words:
+            with open("words", "r") as f:
+                words["set"] = set(f.read().split())
+        return words["set"]
+
+    def word_graph():
+        if "graph" not in words:
+            words["graph"] = load_word_graph()
+        return words["graph"]
+
+    for from_word, to_word in WORD_LADDERS:
+        name = "word_ladder/{}_{}".format(from_word, to_word)
+        add(name + "/breadth_first",
+            lambda a=(from_word, to_word): WordLadderPuzzle(*a, word_set()),
+            lambda p, s: breadth_first_solve(p, stats=s), True)
+        add(name + "/breadth_first_word_graph",
+            lambda a=(from_word, to_word): WordLadderPuzzle(*a, word_graph()),
+            lambda p, s: breadth_first_solve(p, stats=s), True)
+        add(name + "/bidirectional",
+            lambda a=(from_word, to_word): WordLadderPuzzle(*a, word_set()),
+            lambda p, s: bidirectional_solve(p))
+    return found
+
+
+def run_case(index, warmup, repeats):
+    """
+    Return the measurements of case index of cases(), run warmup times
+    untimed and then repeats times.
+
+    @type index: int
+    @type warmup: int
+    @type repeats: int
+    @rtype: dict
+    """
+    name, setup, solve, collects = cases()[index]
+    puzzle = setup()
+    for _ in range(warmup):
+        solve(puzzle, None)
+    times, nodes = [], None
+    for _ in range(repeats):
+        stats = SearchStats() if collects else None
+        start = perf_counter()
+        result = solve(puzzle, stats)
+        times.append(perf_counter() - start)
+        if stats is not None:
+            nodes = stats.nodes_expanded
+    best = min(times)
+    return {"name": name,
+            "solved": result is not None and bool(result),
+            "repeats": repeats,
+            "wall_seconds_min": best,
+            "wall_seconds_mean": sum(times) / len(times),
+            "wall_seconds": times,
+            "nodes_expanded": nodes,
+            "nodes_per_second": None if nodes is None or best == 0
+            else nodes / best,
+            # ru_maxrss is in kilobytes on Linux, bytes on macOS
+            "peak_rss_kb": resource.getrusage(
+                resource.RUSAGE_SELF).ru_maxrss //
+            (1024 if sys.platform == "darwin" else 1)}
+
+
+def _commit():
+    """
+    Return the git commit checked out here, or None if unknown.
+
+    @rtype: str | None
+    """
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+            universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    """
+    Run the benchmarks selected by command-line arguments argv and write
+    the JSON report.
+
+    @type argv: list[str] | None
+    @rtype: None
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--only", default="",
+                        help="run only cases whose name contains this")
+    parser.add_argument("-o", "--output", help="file to write (stdout)")
+    args = parser.parse_args(argv)
+
+    results = []
+    # a fresh process per case keeps peak RSS per case
+    context = multiprocessing.get_context("spawn")
+    for index, (name, _, _, _) in enumerate(cases()):
+        if args.only in name:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_case,
+                                    (index, args.warmup, args.repeats))
+            print("{:70} {:10.4f}s".format(name, result["wall_seconds_min"]),
+                  file=sys.stderr)
+            results.append(result)
+
+    report = {"commit": _commit(),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
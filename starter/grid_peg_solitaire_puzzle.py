@@ -1,5 +1,7 @@
 from puzzle import Puzzle
-import copy
+from puzzle_tools import PuzzleNode
+from functools import lru_cache
+from collections import OrderedDict
 
 #Test
 class GridPegSolitairePuzzle(Puzzle):
@@ -23,11 +25,94 @@ class GridPegSolitairePuzzle(Puzzle):
         assert all([len(x) == len(marker[0]) for x in marker[1:]])
         assert all([all(x in marker_set for x in row) for row in marker])
         assert all([x == "*" or x == "." or x == "#" for x in marker_set])
-        self._marker, self._marker_set = marker, marker_set
+        self._marker_set = marker_set
+        self._rows, self._columns = len(marker), len(marker[0])
+
+        # bitboards: bit (row * columns + column) is set in _pegs for
+        # each "*", in _holes for each "." and in _unused for each "#"
+        self._pegs = self._holes = self._unused = 0
+        for row in range(self._rows):
+            for column in range(self._columns):
+                bit = 1 << (row * self._columns + column)
+                if marker[row][column] == "*":
+                    self._pegs |= bit
+                elif marker[row][column] == ".":
+                    self._holes |= bit
+                else:
+                    self._unused |= bit
+        self._grid = None # marker list, only built when displayed
+
+
+    def _with_pegs(self, pegs, holes):
+        
+        '''(int, int) -> GridPegSolitairePuzzle
+        
+        This helper function returns a puzzle on the same board
+        as self with the given peg and hole bitboards.
+        '''
+        puzzle = GridPegSolitairePuzzle.__new__(GridPegSolitairePuzzle)
+        puzzle._marker_set = self._marker_set
+        puzzle._rows, puzzle._columns = self._rows, self._columns
+        puzzle._pegs, puzzle._holes = pegs, holes
+        puzzle._unused, puzzle._grid = self._unused, None
+        return puzzle
+
+
+    def to_marker(self):
+        
+        '''() -> list[list[str]]
+        
+        This function returns the board in the marker format
+        that the puzzle was created from.
+        '''
+        marker = []
+        for row in range(self._rows):
+            line = []
+            for column in range(self._columns):
+                bit = 1 << (row * self._columns + column)
+                if self._pegs & bit:
+                    line.append("*")
+                elif self._holes & bit:
+                    line.append(".")
+                else:
+                    line.append("#")
+            marker.append(line)
+        return marker
+
+
+    def __getstate__(self):
+        
+        '''() -> dict
+        
+        This function leaves the displayed marker list out when
+        pickling, so only the bitboards are sent between processes.
+        '''
+        state = self.__dict__.copy()
+        state["_grid"] = None
+        return state
+
+
+    @property
+    def _marker(self):
+        if self._grid is None:
+            self._grid = self.to_marker()
+        return self._grid
 
     
     def __eq__(self, other):
-        return (self._marker == other._marker)
+        return (self._columns == other._columns and
+                self._pegs == other._pegs and self._holes == other._holes and
+                self._unused == other._unused)
+
+
+    def state_key(self):
+        
+        '''() -> int
+        
+        This function returns the peg bitboard, which is
+        all that tells two puzzles on the same board apart.
+        '''
+        return self._pegs
 
 
     def __str__(self):
@@ -98,10 +183,10 @@ class GridPegSolitairePuzzle(Puzzle):
 
     def extensions(self):
         
-        '''(list[Puzzle]) -> list[Puzzle Objects]
+        '''(list[Puzzle]) -> generator[Puzzle Objects]
         
-        This function returns a list of the possible 
-        solutions for Peg Solitaire puzzle.
+        This function yields the possible solutions for
+        Peg Solitaire puzzle, each built only when asked for.
         
         
     >>> grid = [["*", "*", "*", "*", "*"],
@@ -130,76 +215,28 @@ class GridPegSolitairePuzzle(Puzzle):
     >>> [<__main__.GridPegSolitairePuzzle object at 0x01CE1A50>, <__main__.GridPegSolitairePuzzle object at 0x01CE1910>, <__main__.GridPegSolitairePuzzle object at 0x01CE17D0>, <__main__.GridPegSolitairePuzzle object at 0x019E5D10>, <__main__.GridPegSolitairePuzzle object at 0x01CE19B0>]
         '''
 
-        grid = self._marker
-        extensions = []
-
-        for row in range(len(grid)):
-
-            for column in range(len(grid[row])):
-
-                # Checking the indexs of each row + column if there is a existing peg
-                if grid[row][column] == "*":
-
-                    # Check for top if inbounds & if the item directly above it is a peg
-                    if (row - 2) > 0 and grid[row - 1][column] == "*":
-
-                        if grid[row - 2][column] ==".":
-
-                            dup = copy.deepcopy(grid)
-
-                            dup[row - 2][column] = "*"
-                            dup[row - 1][column] = "."
-                            dup[row][column] = "."
-                            extension = GridPegSolitairePuzzle(dup, self._marker_set)
-                            extensions.append(extension)
-                            dup = None
-
-
-                    # Check for bottom if inbounds & if the item directly below it is a peg
-                    if (row + 2) < (len(grid)) and grid[row + 1][column] == "*":
+        pegs, holes = self._pegs, self._holes
 
-                        if grid[row + 2][column] == ".":
+        for step, sources in _jump_masks(self._rows, self._columns):
 
-                            dup = copy.deepcopy(grid)
+            # pegs that have a peg next to them and a hole beyond that,
+            # in the direction step, all found at once by shifting
+            if step > 0:
+                movable = pegs & (pegs >> step) & (holes >> 2 * step)
+            else:
+                movable = pegs & (pegs << -step) & (holes << -2 * step)
+            movable &= sources
 
-                            dup[row + 2][column] = "*"
-                            dup[row + 1][column] = "."
-                            dup[row][column] = "."
-                            extension = GridPegSolitairePuzzle(dup, self._marker_set)
-                            extensions.append(extension)
-                            dup = None
-
-
-                    # Check for left if inbounds & if the item directly beside it is a peg
-                    if (column - 2) > 0 and grid[row][column - 1] == "*":
-
-                        if grid[row][column - 2] == ".":
-
-                            dup = copy.deepcopy(grid)
-
-                            dup[row][column - 2] = "*"
-                            dup[row][column - 1] = "."
-                            dup[row][column] = "."
-                            extension = GridPegSolitairePuzzle(dup, self._marker_set)
-                            extensions.append(extension)
-                            dup = None
-
-
-                    # Check for right if inbounds & if the item directly beside it is a peg
-                    if (column + 2) < (len(grid[row])) and grid[row][column + 1] == "*":
-
-                        if grid[row][column + 2] == ".":
-
-                            dup = copy.deepcopy(grid)
-
-                            dup[row][column + 2] = "*"
-                            dup[row][column + 1] = "."
-                            dup[row][column] = "."
-                            extension = GridPegSolitairePuzzle(dup, self._marker_set)
-                            extensions.append(extension)
-                            dup = None
-
-        return extensions
+            while movable:
+                peg = movable & -movable
+                movable ^= peg
+                if step > 0:
+                    over, landing = peg << step, peg << 2 * step
+                else:
+                    over, landing = peg >> -step, peg >> -2 * step
+                # the jumping and jumped pegs leave, the landing fills
+                changed = peg | over | landing
+                yield self._with_pegs(pegs ^ changed, holes ^ changed)
 
 
     def is_solved(self):
@@ -235,24 +272,161 @@ class GridPegSolitairePuzzle(Puzzle):
         True
         '''
 
-        grid = self._marker
+        # exactly one peg bit set
+        return self._pegs != 0 and self._pegs & (self._pegs - 1) == 0
 
-        count = 0
-        
-        # Nested loop to traverse across the grid indexes
-        for row in range(len(grid)):
 
-            for column in range(len(grid[row])):
-                
-                # Checks for any remaining pegs on the grid
-                if grid[row][column] == "*":
+@lru_cache(maxsize=None)
+def _jump_masks(rows, columns):
+    
+    '''(int, int) -> list[tuple[int, int]]
+    
+    This helper function returns, for each direction of jump on a
+    board with the given rows and columns, the bit offset of one
+    step that way and a mask of the places a peg can jump from
+    without its landing place leaving the board.
+    '''
+    masks = []
+    # clockwise from up
+    for step, row_step, column_step in ((-columns, -1, 0), (1, 0, 1),
+                                        (columns, 1, 0), (-1, 0, -1)):
+        sources = 0
+        for row in range(rows):
+            for column in range(columns):
+                if 0 <= row + 2 * row_step < rows and \
+                        0 <= column + 2 * column_step < columns:
+                    sources |= 1 << (row * columns + column)
+        masks.append((step, sources))
+    return masks
+
+
+def peg_count(puzzle):
+    
+    '''GridPegSolitairePuzzle -> int
+    
+    This function returns the number of pegs that still have to
+    be removed. Every jump removes exactly one peg, so this is the
+    exact number of moves left on any path to a solution.
+    
+    >>> peg_count(GridPegSolitairePuzzle([["*", "*", "."]], {"*", "."}))
+    1
+    '''
+    return bin(puzzle._pegs).count("1") - 1
 
-                    count = count + 1
 
-        if count == 1:
-            return True
-        else:
-            return False
+@lru_cache(maxsize=None)
+def _symmetry_tables(rows, columns, unused):
+    
+    '''(int, int, int) -> list[list[list[int]]]
+    
+    This helper function returns, for each reflection or rotation
+    of the board that maps its unused cells onto themselves, lookup
+    tables that carry a bitboard across one byte at a time: entry
+    [chunk][byte] is where the bits byte * 2 ** (8 * chunk) land.
+    '''
+    transforms = [lambda r, c: (r, c),
+                  lambda r, c: (rows - 1 - r, c),
+                  lambda r, c: (r, columns - 1 - c),
+                  lambda r, c: (rows - 1 - r, columns - 1 - c)]
+    if rows == columns:
+        transforms += [lambda r, c: (c, r),
+                       lambda r, c: (columns - 1 - c, r),
+                       lambda r, c: (c, rows - 1 - r),
+                       lambda r, c: (columns - 1 - c, rows - 1 - r)]
+
+    cells = rows * columns
+    tables = []
+    for transform in transforms:
+        # where each cell's bit goes
+        image = []
+        for cell in range(cells):
+            r, c = transform(cell // columns, cell % columns)
+            image.append(1 << (r * columns + c))
+        if sum(image[cell] for cell in range(cells)
+               if unused & (1 << cell)) != unused:
+            continue # the unused cells would move
+        table = []
+        for chunk in range(0, cells, 8):
+            lookup = [0] * 256
+            for byte in range(1, 256):
+                low = byte & -byte
+                cell = chunk + low.bit_length() - 1
+                lookup[byte] = lookup[byte ^ low] | \
+                    (image[cell] if cell < cells else 0)
+            table.append(lookup)
+        tables.append(table)
+    return tables
+
+
+def _canonical(pegs, tables):
+    
+    '''(int, list[list[list[int]]]) -> int
+    
+    This helper function returns the smallest of the images of
+    the peg bitboard under the symmetries in tables, so boards
+    that mirror or rotate into each other share one key.
+    '''
+    best = None
+    for table in tables:
+        image, rest = 0, pegs
+        for lookup in table:
+            image |= lookup[rest & 255]
+            rest >>= 8
+        if best is None or image < best:
+            best = image
+    return best
+
+
+def peg_solitaire_solve(puzzle, table_size=1000000):
+    
+    '''(GridPegSolitairePuzzle, int) -> PuzzleNode
+    
+    This function returns a path from PuzzleNode(puzzle) to a
+    PuzzleNode containing a solution, or None if there is none.
+    It searches depth first, remembering the boards already found
+    to be dead ends up to reflection and rotation, so a mirror image
+    of a dead end is never explored. At most table_size dead ends
+    are remembered; the least recently used are forgotten first.
+    
+    >>> grid = [["*", "*", "*", "*", "*"],
+    ...         ["*", "*", "*", "*", "*"],
+    ...         ["*", "*", "*", "*", "*"],
+    ...         ["*", "*", ".", "*", "*"],
+    ...         ["*", "*", "*", "*", "*"]]
+    >>> sol = peg_solitaire_solve(GridPegSolitairePuzzle(grid, {"*", "."}))
+    >>> sol.puzzle.is_solved()
+    True
+    '''
+    tables = _symmetry_tables(puzzle._rows, puzzle._columns, puzzle._unused)
+    failed = OrderedDict()
+
+    def search(current):
+        # Return the puzzles from a solution back to current, or None.
+        if current.is_solved():
+            return [current]
+        key = _canonical(current._pegs, tables)
+        if key in failed:
+            failed.move_to_end(key)
+            return None
+        for extension in current.extensions():
+            path = search(extension)
+            if path is not None:
+                path.append(current)
+                return path
+        failed[key] = True
+        while len(failed) > table_size:
+            failed.popitem(last=False)
+        return None
+
+    path = search(puzzle)
+    if path is None:
+        return None
+    current = PuzzleNode(path.pop(), [])
+    while path:
+        newNode = PuzzleNode(path.pop(), [], current)
+        current.children.append(newNode)
+        current = newNode
+    return current
 
 
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+"""
+Answer many word-ladder queries against one word set, reusing the
+breadth-first search trees of earlier queries
+"""
+from word_ladder_puzzle import WordLadderPuzzle
+from puzzle_tools import PuzzleNode
+from collections import OrderedDict
+import sys
+
+
+class LadderService:
+    """
+    Shortest word ladders over one word set.
+
+    Each query searches the whole of its source word's component once,
+    keeping the word every other word was first reached from.  These
+    trees are kept, most recently used last, until together they would
+    take more than max_bytes, so later queries from the same word are
+    answered by following parents rather than searching.  (Ladders do
+    not simply reverse: a change must be to a lowercase letter, so
+    "Cong" can step to "song" but not back.)
+
+    === Attributes ===
+    @type max_bytes: int
+        the most memory the cached trees may take, roughly
+    @type hits: int
+        the number of queries answered from a cached tree
+    @type misses: int
+        the number of queries that had to search
+    """
+
+    def __init__(self, words, max_bytes=64 * 1024 * 1024):
+        """
+        Create a new LadderService self over words.
+
+        @type self: LadderService
+        @type words: set[str] | WordGraph
+        @type max_bytes: int
+        @rtype: None
+        """
+        self._words = words
+        # its _next_words finds the neighbours of any word in words
+        self._puzzle = WordLadderPuzzle("", "", words)
+        self._trees = OrderedDict()
+        self._bytes = 0
+        self.max_bytes = max_bytes
+        self.hits, self.misses = 0, 0
+
+    def solve(self, from_word, to_word):
+        """
+        Return a shortest path of PuzzleNodes from
+        WordLadderPuzzle(from_word, to_word, words) to a solved one,
+        ending in the solved one, or None if there is none.
+
+        @type self: LadderService
+        @type from_word: str
+        @type to_word: str
+        @rtype: PuzzleNode | None
+
+        >>> service = LadderService({"cat", "cot", "cog", "dog", "cut"})
+        >>> sol = service.solve("cat", "dog")
+        >>> [node.puzzle.state_key() for node in sol.path()]
+        ['cat', 'cot', 'cog', 'dog']
+        >>> sol = service.solve("cat", "cut")
+        >>> [node.puzzle.state_key() for node in sol.path()]
+        ['cat', 'cut']
+        >>> service.hits, service.misses
+        (1, 1)
+        """
+        words = self.ladder(from_word, to_word)
+        if words is None:
+            return None
+        current = PuzzleNode(WordLadderPuzzle(from_word, to_word,
+                                              self._words))
+        for word in words[1:]:
+            newNode = PuzzleNode(WordLadderPuzzle(word, to_word, self._words),
+                                 [], current)
+            current.children.append(newNode)
+            current = newNode
+        return current
+
+    def ladder(self, from_word, to_word):
+        """
+        Return the words of a shortest ladder from from_word to to_word,
+        both included, or None if there is none.
+
+        @type self: LadderService
+        @type from_word: str
+        @type to_word: str
+        @rtype: list[str] | None
+
+        >>> service = LadderService({"cat", "cot", "cog", "dog", "ape"})
+        >>> service.ladder("cat", "cog")
+        ['cat', 'cot', 'cog']
+        >>> service.ladder("cat", "ape") is None
+        True
+
+        Like the solvers, only the words after from_word need be in the
+        word set.
+
+        >>> from puzzle_tools import breadth_first_solve
+        >>> ws = {"cat", "cot", "dot"}
+        >>> sol = breadth_first_solve(WordLadderPuzzle("xat", "dot", ws))
+        >>> [node.puzzle.state_key() for node in sol.path()]
+        ['xat', 'cat', 'cot', 'dot']
+        >>> LadderService(ws).ladder("xat", "dot")
+        ['xat', 'cat', 'cot', 'dot']
+        >>> LadderService(ws).ladder("xat", "dox") is None
+        True
+        """
+        if from_word == to_word:
+            return [from_word]
+        if to_word not in self._words:
+            return None
+        if from_word in self._trees:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return self._walk(self._tree(from_word), to_word)
+
+    def distance(self, from_word, to_word):
+        """
+        Return the number of changes in a shortest ladder from
+        from_word to to_word, or None if there is none.
+
+        @type self: LadderService
+        @type from_word: str
+        @type to_word: str
+        @rtype: int | None
+
+        >>> LadderService({"cat", "cot", "cog"}).distance("cog", "cat")
+        2
+        """
+        words = self.ladder(from_word, to_word)
+        return None if words is None else len(words) - 1
+
+    def clear(self):
+        """
+        Forget every tree cached by LadderService self.
+
+        @type self: LadderService
+        @rtype: None
+        """
+        self._trees.clear()
+        self._bytes = 0
+
+    def _tree(self, source):
+        # Return the breadth-first search tree from source, as the word
+        # each reached word was first reached from, caching it.
+        #
+        # @type self: LadderService
+        # @type source: str
+        # @rtype: dict[str, str | None]
+        if source in self._trees:
+            self._trees.move_to_end(source)
+            return self._trees[source][0]
+
+        parents = {source: None}
+        frontier = [source]
+        while frontier:
+            nextFrontier = []
+            for word in frontier:
+                for newWord in self._puzzle._next_words(word):
+                    if newWord not in parents:
+                        parents[newWord] = word
+                        nextFrontier.append(newWord)
+            frontier = nextFrontier
+
+        # the dict's table, and the words as keys: each parent is also a
+        # key, but a word set may build new strings for the words it
+        # returns rather than hand out its own
+        size = sys.getsizeof(parents) + sum(sys.getsizeof(word)
+                                            for word in parents)
+        if size <= self.max_bytes:
+            while self._trees and self._bytes + size > self.max_bytes:
+                _, (_, oldSize) = self._trees.popitem(last=False)
+                self._bytes -= oldSize
+            self._trees[source] = (parents, size)
+            self._bytes += size
+        return parents
+
+    def _walk(self, parents, word):
+        # Return the words from the root of the tree parents down to
+        # word, or None if word is not in it.
+        #
+        # @type self: LadderService
+        # @type parents: dict[str, str | None]
+        # @type word: str
+        # @rtype: list[str] | None
+        if word not in parents:
+            return None
+        path = []
+        while word is not None:
+            path.append(word)
+            word = parents[word]
+        path.reverse()
+        return path
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -1,4 +1,5 @@
 from puzzle import Puzzle
+from functools import lru_cache
 
 
 class MNPuzzle(Puzzle):
@@ -24,6 +25,8 @@ class MNPuzzle(Puzzle):
         assert all([len(r) == len(to_grid[0]) for r in to_grid])
         self.n, self.m = len(from_grid), len(from_grid[0])
         self.from_grid, self.to_grid = from_grid, to_grid
+        # fail_fast's answer, once known; slides never change it
+        self._failed = None
 
 
     def __eq__(self, other):
@@ -32,6 +35,16 @@ class MNPuzzle(Puzzle):
         return sameFrom and sameTo
 
 
+    def state_key(self):
+        
+        '''() -> tuple[tuple[str]]
+        
+        This function returns the current grid, which is
+        all that tells two puzzles apart within one search
+        towards to_grid.
+        '''
+        return self.from_grid
+
     def __str__(self):
         
         grid = self.from_grid
@@ -77,10 +90,10 @@ class MNPuzzle(Puzzle):
 
     def extensions(self):
         
-        '''[tuple[tuple[str]] -> list[Puzzle Objects]
+        '''[tuple[tuple[str]] -> generator[Puzzle Objects]
         
-        This function returns the legal possible moves
-        the puzzle can make.
+        This function yields the legal possible moves
+        the puzzle can make, each built only when asked for.
         
         >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
         
@@ -94,7 +107,6 @@ class MNPuzzle(Puzzle):
         '''
 
         grid = self.from_grid
-        extensions = []
 
         def rebuildGrid(grid, spaceX, spaceY, tileX, tileY):
             
@@ -137,34 +149,71 @@ class MNPuzzle(Puzzle):
 
             # create new MNPuzzle object for each extension generated
             # LEFT (slide right)
-            if (x-1) > 0:
+            if (x-1) >= 0:
                 newGrid = rebuildGrid(grid, x, y, x-1, y)
-                extension = MNPuzzle(newGrid, self.to_grid)
-                extensions.append(extension)
+                yield self._extend(newGrid)
 
             # RIGHT (slide left)
             if (x+1) < len(grid[y]):
                 newGrid = rebuildGrid(grid, x, y, x+1, y)
-                extension = MNPuzzle(newGrid, self.to_grid)
-                extensions.append(extension)
+                yield self._extend(newGrid)
 
             # UP (slide down)
-            if (y-1) > 0:
+            if (y-1) >= 0:
                 newGrid = rebuildGrid(grid, x, y, x, y-1)
-                extension = MNPuzzle(newGrid, self.to_grid)
-                extensions.append(extension)
+                yield self._extend(newGrid)
 
             # DOWN (slide up)
             if (y+1) < len(grid):
                 newGrid = rebuildGrid(grid, x, y, x, y+1)
-                extension = MNPuzzle(newGrid, self.to_grid)
-                extensions.append(extension)
+                yield self._extend(newGrid)
+
+
+    def _extend(self, grid):
+
+        '''tuple[tuple[str]] -> MNPuzzle
 
-        return extensions
+        This helper function returns the puzzle in state grid,
+        one slide from this one, which fails fast just when
+        this one does.
+        '''
+        puzzle = MNPuzzle(grid, self.to_grid)
+        puzzle._failed = self._failed
+        return puzzle
+
+
+    def fail_fast(self):
+
+        '''() -> Bool
+
+        This function checks whether the target can never be
+        reached. Each slide swaps the blank with a tile and moves
+        the blank one step, so the parity of the permutation taking
+        from_grid to to_grid, blank included, must match the parity
+        of the blank's distance from its target cell.
+
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> MNPuzzle((("*", "2", "3"), ("1", "4", "5")),
+        ...          target_grid).fail_fast()
+        False
+        >>> MNPuzzle((("2", "1", "3"), ("4", "5", "*")),
+        ...          target_grid).fail_fast()
+        True
+        '''
+        if self._failed is None:
+            to_grid = self.to_grid
+            if len(to_grid) != self.n or len(to_grid[0]) != self.m:
+                self._failed = True
+            else:
+                self._failed = _unsolvable(
+                    [tile for row in self.from_grid for tile in row],
+                    [tile for row in to_grid for tile in row],
+                    "*", self.n, self.m)
+        return self._failed
 
 
     def is_solved(self):
-        
+
         '''[tuple[tuple[str]] -> Bool
         
         This function checks whether the
@@ -181,6 +230,347 @@ class MNPuzzle(Puzzle):
             False
         '''
         return self.from_grid == self.to_grid
+
+
+class MNContext:
+    """
+    Everything about an nxm puzzle's target that FlatMNPuzzles working
+    towards it share by reference: the target itself, the symbols in
+    use and the cells next to each cell.
+    """
+
+    def __init__(self, to_grid):
+        """
+        MNContext for puzzles working towards state to_grid
+
+        @param MNContext self: this MNContext
+        @param tuple[tuple[str]] to_grid: solution configuration
+        @rtype: None
+        """
+        assert all([len(r) == len(to_grid[0]) for r in to_grid])
+        self.to_grid = to_grid
+        self.n, self.m = len(to_grid), len(to_grid[0])
+        # tiles are stored as indices into symbols
+        self.symbols = sorted(set(tile for row in to_grid for tile in row))
+        assert len(self.symbols) <= 256
+        self.codes = {self.symbols[i]: i for i in range(len(self.symbols))}
+        self.blank_code = self.codes.get("*")
+        self.goal = self.encode(to_grid)
+        # cells the blank can swap with from each cell: the tile to its
+        # left, right, above and below, in the order MNPuzzle uses
+        n, m = self.n, self.m
+        self.neighbours = tuple(
+            tuple([i - 1] * (i % m > 0) + [i + 1] * (i % m < m - 1) +
+                  [i - m] * (i >= m) + [i + m] * (i < (n - 1) * m))
+            for i in range(n * m))
+        # distance[code][cell] from cell to code's place in to_grid
+        self.distance = [[abs(i // m - j // m) + abs(i % m - j % m)
+                          for i in range(n * m)]
+                         for j in [self.goal.index(code)
+                                   for code in range(len(self.symbols))]]
+
+
+    def encode(self, grid):
+        
+        '''tuple[tuple[str]] -> bytes
+        
+        This function returns grid as a flat row-by-row string
+        of tile indices.
+        '''
+        return bytes(self.codes[tile] for row in grid for tile in row)
+
+
+    def decode(self, tiles):
+        
+        '''bytes -> tuple[tuple[str]]
+        
+        This function returns the grid that tiles encodes.
+        '''
+        m = self.m
+        return tuple(tuple(self.symbols[code] for code in tiles[r:r + m])
+                     for r in range(0, len(tiles), m))
+
+
+    def puzzle(self, from_grid):
+        
+        '''tuple[tuple[str]] -> FlatMNPuzzle
+        
+        This function returns a FlatMNPuzzle in state from_grid
+        working towards this context's to_grid.
+        
+        >>> context = MNContext((("1", "2", "3"), ("4", "5", "*")))
+        >>> p = context.puzzle((("*", "2", "3"), ("1", "4", "5")))
+        >>> p.from_grid
+        (('*', '2', '3'), ('1', '4', '5'))
+        '''
+        assert len(from_grid) == self.n
+        return FlatMNPuzzle(self.encode(from_grid), self)
+
+
+class FlatMNPuzzle(Puzzle):
+    """
+    An nxm puzzle stored as one flat string of tile indices, with the
+    blank's cell cached, and its target in an MNContext shared by every
+    puzzle in a search.
+    """
+
+    __slots__ = ("_tiles", "_context", "_blank", "_failed")
+
+    def __init__(self, tiles, context, blank=None, failed=None):
+        """
+        FlatMNPuzzle with tiles in the order of context's cells
+
+        @param FlatMNPuzzle self: this FlatMNPuzzle
+        @param bytes tiles: tile index in each cell, row by row
+        @param MNContext context: target of the puzzle
+        @param int | None blank: cell of the empty space, if known
+        @param bool | None failed: what fail_fast returns, if known
+        @rtype: None
+        """
+        self._tiles, self._context = tiles, context
+        if blank is None and context.blank_code is not None:
+            blank = tiles.find(context.blank_code)
+        self._blank, self._failed = blank, failed
+
+
+    @property
+    def n(self):
+        return self._context.n
+
+
+    @property
+    def m(self):
+        return self._context.m
+
+
+    @property
+    def from_grid(self):
+        return self._context.decode(self._tiles)
+
+
+    @property
+    def to_grid(self):
+        return self._context.to_grid
+
+
+    def to_mn_puzzle(self):
+        
+        '''() -> MNPuzzle
+        
+        This function returns the MNPuzzle in the same state.
+        '''
+        return MNPuzzle(self.from_grid, self.to_grid)
+
+
+    def __eq__(self, other):
+        return (isinstance(other, FlatMNPuzzle) and
+                self._tiles == other._tiles and
+                self._context.to_grid == other._context.to_grid)
+
+
+    def __str__(self):
+        return str(self.to_mn_puzzle())
+
+
+    def state_key(self):
+        
+        '''() -> bytes
+        
+        This function returns the flat tile string.
+        '''
+        return self._tiles
+
+
+    def extensions(self):
+        
+        '''() -> generator[FlatMNPuzzle]
+        
+        This function yields the puzzles one slide away, in
+        the same order as MNPuzzle.extensions.
+        
+        >>> context = MNContext((("1", "2", "3"), ("4", "5", "*")))
+        >>> p = context.puzzle((("1", "2", "3"), ("4", "*", "5")))
+        >>> [e.from_grid[1] for e in p.extensions()]
+        [('*', '4', '5'), ('4', '5', '*'), ('4', '2', '5')]
+        '''
+        if self._blank is None or self._blank < 0:
+            return
+        tiles, blank, context = self._tiles, self._blank, self._context
+        for cell in context.neighbours[blank]:
+            swapped = bytearray(tiles)
+            swapped[blank], swapped[cell] = tiles[cell], tiles[blank]
+            yield FlatMNPuzzle(bytes(swapped), context, cell, self._failed)
+
+
+    def is_solved(self):
+        
+        '''() -> bool
+        
+        This function checks whether the puzzle is in its
+        target state.
+        '''
+        return self._tiles == self._context.goal
+
+
+    def fail_fast(self):
+
+        '''() -> bool
+
+        This function checks whether the target can never be
+        reached, as MNPuzzle.fail_fast does.
+
+        >>> context = MNContext((("1", "2", "3"), ("4", "5", "*")))
+        >>> context.puzzle((("2", "1", "3"), ("4", "5", "*"))).fail_fast()
+        True
+        '''
+        if self._failed is None:
+            context = self._context
+            self._failed = _unsolvable(self._tiles, context.goal,
+                                       context.blank_code, context.n,
+                                       context.m)
+        return self._failed
+
+
+def _unsolvable(tiles, goal, blank, n, m):
+
+    '''(sequence, sequence, object, int, int) -> bool
+
+    This helper function checks whether the nxm grid whose cells
+    hold tiles, row by row, can never slide to goal, with blank as
+    the empty space. It compares the tiles in use, then the order
+    of the tiles if there is only one row or column, and otherwise
+    the parity of the permutation between them, which says nothing
+    when tiles repeat.
+
+    >>> _unsolvable("12345*", "1234*5", "*", 2, 3)
+    False
+    >>> _unsolvable("21345*", "12345*", "*", 2, 3)
+    True
+    >>> _unsolvable("1*2", "21*", "*", 1, 3)
+    True
+    '''
+    if sorted(tiles) != sorted(goal):
+        return True
+    if blank is None or blank not in tiles:
+        return tiles != goal # nothing can slide
+    if n == 1 or m == 1:
+        # the tiles can only ever stay in the same order
+        return ([tile for tile in tiles if tile != blank] !=
+                [tile for tile in goal if tile != blank])
+    where = {goal[i]: i for i in range(len(goal))}
+    if len(where) < len(goal):
+        return False
+    # a cycle through k cells takes k - 1 swaps
+    swaps, seen = 0, [False] * len(tiles)
+    for i in range(len(tiles)):
+        if not seen[i]:
+            j = i
+            while not seen[j]:
+                seen[j] = True
+                j = where[tiles[j]]
+                swaps += 1
+            swaps -= 1
+    b, g = tiles.index(blank), goal.index(blank)
+    distance = abs(b // m - g // m) + abs(b % m - g % m)
+    return swaps % 2 != distance % 2
+
+
+@lru_cache(maxsize=None)
+def _goal_positions(to_grid):
+    
+    '''tuple[tuple[str]] -> dict[str, tuple[int, int]]
+    
+    This helper function maps each tile of to_grid to its
+    (row, column), leaving out the empty space. It is cached
+    since every puzzle in a search shares the same to_grid.
+    '''
+    return {to_grid[y][x]: (y, x)
+            for y in range(len(to_grid))
+            for x in range(len(to_grid[y])) if to_grid[y][x] != "*"}
+
+
+def manhattan_distance(puzzle):
+    
+    '''MNPuzzle -> int
+    
+    This function returns the sum over all tiles of the number
+    of rows and columns between the tile and its place in
+    to_grid. Each move shifts one tile by one place, so this
+    never overestimates the moves left.
+    
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+    >>> manhattan_distance(MNPuzzle(start_grid, target_grid))
+    3
+    '''
+    if isinstance(puzzle, FlatMNPuzzle):
+        # distances are tabled in the shared context
+        distance, blank_code = puzzle._context.distance, \
+            puzzle._context.blank_code
+        return sum(distance[puzzle._tiles[i]][i]
+                   for i in range(len(puzzle._tiles))
+                   if puzzle._tiles[i] != blank_code)
+    goal = _goal_positions(puzzle.to_grid)
+    grid = puzzle.from_grid
+    total = 0
+    for y in range(len(grid)):
+        for x in range(len(grid[y])):
+            if grid[y][x] != "*":
+                goal_y, goal_x = goal[grid[y][x]]
+                total += abs(goal_y - y) + abs(goal_x - x)
+    return total
+
+
+def _line_conflicts(goals):
+    
+    '''list[int] -> int
+    
+    This helper function returns how many tiles have to leave a
+    row (or column) so that the rest, whose goal places along the
+    line are goals in order, can pass each other.
+    '''
+    goals = goals[:]
+    removed = 0
+    while True:
+        # conflicts of each tile with the tiles left in the line
+        conflicts = [sum(1 for j in range(len(goals))
+                         if (j < i and goals[j] > goals[i]) or
+                         (j > i and goals[j] < goals[i]))
+                     for i in range(len(goals))]
+        if len(conflicts) == 0 or max(conflicts) == 0:
+            return removed
+        goals.pop(conflicts.index(max(conflicts)))
+        removed += 1
+
+
+def linear_conflict(puzzle):
+    
+    '''MNPuzzle -> int
+    
+    This function returns manhattan_distance plus two moves for
+    each tile that must step out of its goal row or column to
+    let another tile in the same line past it.
+    
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> start_grid = (("2", "1", "3"), ("4", "5", "*"))
+    >>> manhattan_distance(MNPuzzle(start_grid, target_grid))
+    2
+    >>> linear_conflict(MNPuzzle(start_grid, target_grid))
+    4
+    '''
+    goal = _goal_positions(puzzle.to_grid)
+    grid = puzzle.from_grid
+    removed = 0
+    for y in range(len(grid)):
+        removed += _line_conflicts([goal[tile][1] for tile in grid[y]
+                                    if tile != "*" and goal[tile][0] == y])
+    for x in range(len(grid[0])):
+        column = [grid[y][x] for y in range(len(grid))]
+        removed += _line_conflicts([goal[tile][0] for tile in column
+                                    if tile != "*" and goal[tile][1] == x])
+    return manhattan_distance(puzzle) + 2 * removed
+
+
 '''
 if __name__ == "__main__":
     import doctest
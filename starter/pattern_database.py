@@ -0,0 +1,267 @@
+"""
+Additive pattern databases: precomputed heuristics for MNPuzzles
+working towards one target
+"""
+from mn_puzzle import FlatMNPuzzle
+from array import array
+import json
+import mmap
+
+
+class PatternDatabase:
+    """
+    A heuristic for MNPuzzles working towards to_grid, for astar_solve.
+
+    The tiles are split into groups.  For each group a table holds,
+    for every way of placing the group's tiles, the fewest moves of
+    those tiles that bring them to their places in to_grid, however
+    the other tiles move.  No move is counted in two groups, so the
+    sum over the groups never overestimates the moves left, and it
+    is never below manhattan_distance.
+
+    === Attributes ===
+    @type to_grid: tuple[tuple[str]]
+        the target the tables are for
+    @type groups: list[list[str]]
+        the tiles of each group
+    """
+
+    def __init__(self, to_grid, groups, tables):
+        """
+        Create a new PatternDatabase self for to_grid, with a table of
+        moves for each of groups.
+
+        The table of a group of tiles t0, t1, ... holds at index
+        c0 + c1 * N + c2 * N ** 2 + ..., where N is the number of cells
+        and ci the cell, row by row, of ti, the moves for that placing.
+
+        @type self: PatternDatabase
+        @type to_grid: tuple[tuple[str]]
+        @type groups: list[list[str]]
+        @type tables: list[array | memoryview]
+        @rtype: None
+        """
+        self.to_grid, self.groups, self._tables = to_grid, groups, tables
+        # codes of tiles in FlatMNPuzzles working towards to_grid
+        symbols = sorted(set(tile for row in to_grid for tile in row))
+        codes = {symbols[i]: i for i in range(len(symbols))}
+        self._codes = [[codes[tile] for tile in group] for group in groups]
+
+    def __call__(self, puzzle):
+        """
+        Return the sum over the groups of PatternDatabase self of the
+        moves needed by the tiles in each group of puzzle.
+
+        @type self: PatternDatabase
+        @type puzzle: MNPuzzle | FlatMNPuzzle
+        @rtype: int
+
+        >>> from mn_puzzle import MNPuzzle
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> database = build_pattern_database(target_grid)
+        >>> database(MNPuzzle(start_grid, target_grid))
+        3
+        """
+        if puzzle.to_grid != self.to_grid:
+            raise ValueError("puzzle does not work towards this database's "
+                             "target")
+        size = len(self.to_grid) * len(self.to_grid[0])
+        total = 0
+        if isinstance(puzzle, FlatMNPuzzle):
+            tiles = puzzle._tiles
+            for codes, table in zip(self._codes, self._tables):
+                index = 0
+                for code in reversed(codes):
+                    index = index * size + tiles.find(code)
+                total += table[index]
+        else:
+            cells = {}
+            for row in puzzle.from_grid:
+                for tile in row:
+                    cells[tile] = len(cells)
+            for group, table in zip(self.groups, self._tables):
+                index = 0
+                for tile in reversed(group):
+                    index = index * size + cells[tile]
+                total += table[index]
+        return total
+
+    def save(self, path):
+        """
+        Write PatternDatabase self to the file at path, for
+        load_pattern_database: a line of JSON describing it, then each
+        table as one byte per entry.
+
+        @type self: PatternDatabase
+        @type path: str
+        @rtype: None
+        """
+        header = json.dumps({"pattern_database": 1,
+                             "to_grid": self.to_grid,
+                             "groups": self.groups,
+                             "sizes": [len(table) for table in self._tables]})
+        with open(path, "wb") as f:
+            f.write(header.encode("utf-8") + b"\n")
+            for table in self._tables:
+                f.write(bytes(table))
+
+
+def load_pattern_database(path):
+    """
+    Return the PatternDatabase saved to the file at path, with its
+    tables read through mmap, so they are only paged in as they are
+    used and are shared by every process that loads them.
+
+    @type path: str
+    @rtype: PatternDatabase
+
+    >>> import os, tempfile
+    >>> from mn_puzzle import MNPuzzle
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> fd, path = tempfile.mkstemp()
+    >>> os.close(fd)
+    >>> build_pattern_database(target_grid).save(path)
+    >>> database = load_pattern_database(path)
+    >>> database(MNPuzzle((("*", "2", "3"), ("1", "4", "5")), target_grid))
+    3
+    >>> del database
+    >>> os.remove(path)
+    """
+    with open(path, "rb") as f:
+        tables = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    end = tables.find(b"\n")
+    header = json.loads(tables[:end].decode("utf-8")) if end >= 0 else {}
+    if header.get("pattern_database") != 1:
+        raise ValueError("{} does not hold a PatternDatabase".format(path))
+    view = memoryview(tables)
+    offset, found = end + 1, []
+    for size in header["sizes"]:
+        found.append(view[offset:offset + size])
+        offset += size
+    to_grid = tuple(tuple(row) for row in header["to_grid"])
+    return PatternDatabase(to_grid, header["groups"], found)
+
+
+def default_groups(to_grid, group_size=5):
+    """
+    Return the tiles of to_grid, other than the blank, split row by row
+    into as few groups of at most group_size tiles as possible, as
+    even in size as possible.
+
+    Building a table takes time and memory growing like the number of
+    cells to the power of its group's size, plus one for the blank
+    during the search: groups of five suit the 15-puzzle, while six
+    (6-6-3) gives a stronger heuristic but needs several hundred
+    megabytes and a long wait to build.
+
+    @type to_grid: tuple[tuple[str]]
+    @type group_size: int
+    @rtype: list[list[str]]
+
+    >>> default_groups((("1", "2", "3"), ("4", "5", "6"), ("7", "8", "*")))
+    [['1', '2', '3', '4'], ['5', '6', '7', '8']]
+    """
+    tiles = [tile for row in to_grid for tile in row if tile != "*"]
+    count = -(-len(tiles) // group_size)
+    groups, start = [], 0
+    for i in range(count):
+        end = start + (len(tiles) - start) // (count - i)
+        groups.append(tiles[start:end])
+        start = end
+    return groups
+
+
+def build_pattern_database(to_grid, groups=None, group_size=5):
+    """
+    Return a PatternDatabase for to_grid with a table for each of
+    groups, or of default_groups(to_grid, group_size) if groups is
+    None.  The tiles of to_grid must all differ.
+
+    @type to_grid: tuple[tuple[str]]
+    @type groups: list[list[str]] | None
+    @type group_size: int
+    @rtype: PatternDatabase
+
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> build_pattern_database(target_grid, [["1", "2"], ["3"]]).groups
+    [['1', '2'], ['3']]
+    """
+    flat = [tile for row in to_grid for tile in row]
+    if len(set(flat)) != len(flat) or "*" not in flat:
+        raise ValueError("to_grid needs one blank and distinct tiles")
+    if groups is None:
+        groups = default_groups(to_grid, group_size)
+    tables = [_build_table(to_grid, [flat.index(tile) for tile in group])
+              for group in groups]
+    return PatternDatabase(to_grid, [list(group) for group in groups],
+                           tables)
+
+
+def _build_table(to_grid, goals):
+    # Return the table for the tiles whose cells in to_grid are goals,
+    # by breadth-first search back from to_grid.  Moves of other tiles
+    # are free, so each state reached is a placing of the group's tiles
+    # together with the whole region of cells the blank can wander
+    # through without moving them (0-1 BFS with the free moves taken
+    # all at once).
+    #
+    # @type to_grid: tuple[tuple[str]]
+    # @type goals: list[int]
+    # @rtype: array
+    n, m = len(to_grid), len(to_grid[0])
+    size = n * m
+    neighbours = [[i - 1] * (i % m > 0) + [i + 1] * (i % m < m - 1) +
+                  [i - m] * (i >= m) + [i + m] * (i < (n - 1) * m)
+                  for i in range(size)]
+    weights = [size ** i for i in range(len(goals))]
+    table = array("B", [255]) * size ** len(goals)
+    # visited[index * size + cell]: cell's region with the tiles placed
+    # as index has been searched
+    visited = bytearray(size ** len(goals) * size)
+
+    start = sum(goals[i] * weights[i] for i in range(len(goals)))
+    blank = [tile for row in to_grid for tile in row].index("*")
+    frontier, depth = [start * size + blank], 0
+    while frontier:
+        nextFrontier = []
+        for key in frontier:
+            if visited[key]:
+                continue
+            index, blank = divmod(key, size)
+            if table[index] > depth:
+                table[index] = depth
+            # which of the group's tiles is in each cell, if any
+            at = [-1] * size
+            rest = index
+            for i in range(len(goals)):
+                rest, cell = divmod(rest, size)
+                at[cell] = i
+            # every cell the blank reaches for free
+            region, stack = [], [blank]
+            visited[key] = 1
+            base = index * size
+            while stack:
+                cell = stack.pop()
+                region.append(cell)
+                for other in neighbours[cell]:
+                    if at[other] < 0 and not visited[base + other]:
+                        visited[base + other] = 1
+                        stack.append(other)
+            # moving one of the group's tiles into the blank costs one
+            for cell in region:
+                for other in neighbours[cell]:
+                    i = at[other]
+                    if i >= 0:
+                        newKey = ((index + (cell - other) * weights[i]) *
+                                  size + other)
+                        if not visited[newKey]:
+                            nextFrontier.append(newKey)
+        frontier = nextFrontier
+        depth = min(depth + 1, 254)
+    return table
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
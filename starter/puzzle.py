@@ -4,6 +4,9 @@ class Puzzle:
     or even unsolvable.
     """
 
+    # no per-instance attributes here, so subclasses may use __slots__
+    __slots__ = ()
+
     def fail_fast(self):
         """
         Return True iff Puzzle self can never be extended to a solution.
@@ -28,9 +31,28 @@ class Puzzle:
         """
         raise NotImplementedError
 
+    def state_key(self):
+        """
+        Return a hashable key identifying the configuration of Puzzle self.
+
+        Two puzzles taking part in the same search have equal keys iff
+        they are in the same configuration, so solvers can keep their
+        visited states in a set or dict.
+
+        This is an abstract method that must be implemented
+        in a subclass.
+
+        @type self: Puzzle
+        @rtype: Hashable
+        """
+        raise NotImplementedError
+
     def extensions(self):
         """
-        Return list of legal extensions of Puzzle self.
+        Yield the legal extensions of Puzzle self.
+
+        Solvers only build the extensions they look at, so subclasses
+        should produce them lazily rather than as a list.
 
         This is an abstract method that must be implemented
         in a subclass.
@@ -2,13 +2,40 @@
 Some functions for working with puzzles
 """
 from puzzle import Puzzle
+from mn_puzzle import MNPuzzle, FlatMNPuzzle
 from collections import deque
-# set higher recursion limit
-# which is needed in PuzzleNode.__str__
-#import resource
-import sys
-#resource.setrlimit(resource.RLIMIT_STACK, (2**29, -1))
-sys.setrecursionlimit(10**6)
+from heapq import heappush, heappop
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from time import monotonic, perf_counter
+from functools import wraps
+from operator import methodcaller
+import inspect
+import multiprocessing
+import signal
+import threading
+
+
+def _collects_stats(solver):
+    # Return solver wrapped to time the search in the SearchStats passed
+    # to it as keyword argument stats, if any, and attach them to any
+    # SearchInterrupted it returns.
+    #
+    # @type solver: function
+    # @rtype: function
+    @wraps(solver)
+    def collecting(*args, **kwargs):
+        stats = kwargs.get("stats")
+        if stats is None:
+            return solver(*args, **kwargs)
+        stats.begin()
+        try:
+            result = solver(*args, **kwargs)
+        finally:
+            stats.end()
+        if isinstance(result, SearchInterrupted):
+            result.stats = stats
+        return result
+    return collecting
 
 
 # TODO
@@ -17,42 +44,86 @@ sys.setrecursionlimit(10**6)
 # you are welcome to create any helper functions
 # you like
 
-def depth_first_solve(puzzle):
+@_collects_stats
+def depth_first_solve(puzzle, max_nodes=None, max_seconds=None,
+                      cancel=None, stats=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child containing an extension of the puzzle
     in its parent. Return None if this is not possible.
 
+    If expanding more than max_nodes nodes or searching for more than
+    max_seconds seconds would be needed, or cancel is found to be set,
+    give up and return a SearchInterrupted instead.
+
+    If stats is a SearchStats, it collects statistics on the search.
+
     @type puzzle: Puzzle
-    @rtype: PuzzleNode
+    @type max_nodes: int | None
+    @type max_seconds: float | None
+    @type cancel: CancelToken | Event | None
+    @type stats: SearchStats | None
+    @rtype: PuzzleNode | SearchInterrupted
     """
+    return _depth_first_search(puzzle,
+                               _make_budget(max_nodes, max_seconds, cancel),
+                               stats)
+
+
+def _depth_first_search(puzzle, budget, stats, visited=()):
+    # Return depth_first_solve(puzzle) within budget, collecting stats,
+    # never reaching a puzzle whose state key is in visited.
+    #
+    # @type puzzle: Puzzle
+    # @type budget: _Budget | None
+    # @type stats: SearchStats | None
+    # @type visited: iterable[object]
+    # @rtype: PuzzleNode | SearchInterrupted | None
+    is_solved, fail_fast, extensions = _calls(stats)
+
     # instantiating stack using new PuzzleNode (root)
     root = PuzzleNode(puzzle)
-    stack = deque([root])
-    tracker = deque([])
+    if is_solved(puzzle):
+        return root
+    if fail_fast(puzzle):
+        return None
+    if budget is not None and budget.spend(0):
+        return budget.interrupted(0)
+    if stats is not None:
+        stats.expanded(0, 1)
+    # each entry is a node and the iterator of its extensions not yet
+    # looked at, so siblings are only built once their turn comes; the
+    # stack's size stands in for the frontier in stats
+    stack = deque([(root, iter(extensions(puzzle)))])
+    # state keys of the puzzles already reached
+    visited = set(visited)
+    visited.add(puzzle.state_key())
 
     # while puzzle still has moves to make (or is not solved yet)
     while len(stack) > 0:
 
-        current = stack.pop() # update current node
-
-        # if child node is solved, return it
-        if current.puzzle.is_solved():
-            return newNode
-
-        if current not in tracker:
-
-            tracker.append(current)
-            extensions = current.puzzle.extensions() # gather moves to make
-
-            # loop through extensions (depth)
-            for i in range(len(extensions)):
-                newNode = PuzzleNode(extensions[i], [], current)
-                current.children.append(newNode) # add as child of current node
-                if newNode not in tracker:
-                    stack.append(newNode) # add to stack
+        current, moves = stack[-1]
+        extension = next(moves, None) # next move to make
+        if extension is None:
+            stack.pop() # every move from current tried
+            continue
 
+        key = extension.state_key()
+        if key not in visited:
+            visited.add(key)
+            newNode = PuzzleNode(extension, parent=current)
 
+            # if child node is solved, return it
+            if is_solved(extension):
+                return _link_path(newNode)
+            if not fail_fast(extension):
+                if budget is not None and budget.spend(len(stack)):
+                    return budget.interrupted(len(stack))
+                if stats is not None:
+                    stats.expanded(len(stack), len(stack) + 1)
+                stack.append((newNode, iter(extensions(extension))))
+        elif stats is not None:
+            stats.duplicates += 1
 
     return None # no solution was found
 
@@ -65,69 +136,1224 @@ def depth_first_solve(puzzle):
 # you like
 # Hint: you may find a queue useful, that's why
 # we imported deque
-def breadth_first_solve(puzzle):
+@_collects_stats
+def breadth_first_solve(puzzle, max_nodes=None, max_seconds=None,
+                        cancel=None, stats=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child PuzzleNode containing an extension
     of the puzzle in its parent.  Return None if this is not possible.
 
+    If expanding more than max_nodes nodes or searching for more than
+    max_seconds seconds would be needed, or cancel is found to be set,
+    give up and return a SearchInterrupted instead.
+
+    If stats is a SearchStats, it collects statistics on the search.
+
     @type puzzle: Puzzle
-    @rtype: PuzzleNode
+    @type max_nodes: int | None
+    @type max_seconds: float | None
+    @type cancel: CancelToken | Event | None
+    @type stats: SearchStats | None
+    @rtype: PuzzleNode | SearchInterrupted
     """
+    budget = _make_budget(max_nodes, max_seconds, cancel)
+    is_solved, fail_fast, extensions = _calls(stats)
     # instantiating queue using new PuzzleNode (root)
-    queue = deque([PuzzleNode(puzzle, [])])
+    root = PuzzleNode(puzzle)
+    if is_solved(puzzle):
+        return root
+    # each entry is a node and its depth
+    queue = deque([(root, 0)])
+    # state keys of every puzzle that has been queued
+    seen = {puzzle.state_key()}
 
     # while puzzle still has moves to make (or is not solved yet)
     while len(queue) > 0:
 
-        current = queue.popleft() # update current node
-        extensions = current.puzzle.extensions() # gather moves to make
+        current, depth = queue.popleft() # update current node
+        if fail_fast(current.puzzle):
+            continue
+        if budget is not None and budget.spend(depth):
+            return budget.interrupted(len(queue))
+        if stats is not None:
+            stats.expanded(depth, len(queue) + 1)
 
         # loop through extensions (breadth)
-        for i in range(len(extensions)):
-            newNode = PuzzleNode(extensions[i], [], current)
+        for extension in extensions(current.puzzle):
+            key = extension.state_key()
 
             # do not include already traversed nodes
-            if newNode not in queue:
-                current.children.append(newNode) # add as child of current node
-                queue.append(newNode) # add to queue
+            if key not in seen:
+                seen.add(key)
+                newNode = PuzzleNode(extension, parent=current)
+                queue.append((newNode, depth + 1)) # add to queue
 
                 # if child node is solved, return it
-                if newNode.puzzle.is_solved():
-                    return newNode
+                if is_solved(newNode.puzzle):
+                    return _link_path(newNode)
+            elif stats is not None:
+                stats.duplicates += 1
+
+
+    return None # no solution was found
+
+
+
+@_collects_stats
+def astar_solve(puzzle, heuristic, max_nodes=None, max_seconds=None,
+                cancel=None, stats=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child PuzzleNode containing an extension
+    of the puzzle in its parent.  Return None if this is not possible.
+
+    Nodes are expanded in order of moves made so far plus
+    heuristic(puzzle), so the path found has the fewest moves whenever
+    heuristic never overestimates the moves left.  Among nodes in the
+    same place in that order the one with the most moves made comes
+    first, so a heuristic that is exact goes straight down.
+
+    If expanding more than max_nodes nodes or searching for more than
+    max_seconds seconds would be needed, or cancel is found to be set,
+    give up and return a SearchInterrupted instead.
+
+    If stats is a SearchStats, it collects statistics on the search.
+
+    @type puzzle: Puzzle
+    @type heuristic: (Puzzle) -> int
+    @type max_nodes: int | None
+    @type max_seconds: float | None
+    @type cancel: CancelToken | Event | None
+    @type stats: SearchStats | None
+    @rtype: PuzzleNode | SearchInterrupted
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle, hamming_distance
+    >>> ws = {"cat", "cot", "cog", "dog", "cut"}
+    >>> sol = astar_solve(WordLadderPuzzle("cat", "dog", ws), hamming_distance)
+    >>> path = []
+    >>> while sol:
+    ...     path.append(sol.puzzle.state_key())
+    ...     sol = sol.parent
+    >>> path[::-1]
+    ['cat', 'cot', 'cog', 'dog']
+    >>> from grid_peg_solitaire_puzzle import (GridPegSolitairePuzzle,
+    ...                                        peg_count)
+    >>> grid = [["*"] * 5 for row in range(5)]
+    >>> grid[0][2] = "."
+    >>> sol = astar_solve(GridPegSolitairePuzzle(grid, {"*", "."}),
+    ...                   peg_count, max_nodes=5000)
+    >>> len(sol.path())
+    24
+    """
+    budget = _make_budget(max_nodes, max_seconds, cancel)
+    is_solved, fail_fast, extensions = _calls(stats)
+    root = PuzzleNode(puzzle)
+    # frontier entries are (f, -g, tie, g, node): among equal f the
+    # deepest comes first, since its heuristic has the least left to
+    # guess, and tie keeps the heap from ever comparing PuzzleNodes
+    frontier = [(heuristic(puzzle), 0, 0, 0, root)]
+    # fewest moves found so far to reach each state
+    best_g = {puzzle.state_key(): 0}
+    tie = 1
+
+    while len(frontier) > 0:
+
+        f, _, _, g, current = heappop(frontier)
+        if g > best_g[current.puzzle.state_key()]:
+            if stats is not None:
+                stats.duplicates += 1
+            continue # a shorter way to this state was queued later
 
+        if is_solved(current.puzzle):
+            return _link_path(current)
+        if fail_fast(current.puzzle):
+            continue
+        if budget is not None and budget.spend(g):
+            return budget.interrupted(len(frontier))
+        if stats is not None:
+            stats.expanded(g, len(frontier) + 1)
+
+        for extension in extensions(current.puzzle):
+            key = extension.state_key()
+            if key in best_g and g + 1 >= best_g[key]:
+                if stats is not None:
+                    stats.duplicates += 1
+            else:
+                best_g[key] = g + 1
+                newNode = PuzzleNode(extension, parent=current)
+                heappush(frontier, (g + 1 + heuristic(extension), -g - 1,
+                                    tie, g + 1, newNode))
+                tie += 1
 
     return None # no solution was found
 
 
 
+@_collects_stats
+def ida_star_solve(puzzle, max_nodes=None, max_seconds=None, cancel=None,
+                   stats=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution with the fewest moves, with each child PuzzleNode
+    containing an extension of the puzzle in its parent.  Return None
+    if this is not possible.
+
+    Iterative-deepening A* over the tiles of MNPuzzle or FlatMNPuzzle
+    puzzle, bounded by manhattan distance.  Moves are made and undone on
+    one flat board, so memory stays linear in the solution depth;
+    PuzzleNodes, of puzzle's own class, are only built for the path that
+    is returned.  Unsolvable grids are only rejected if
+    puzzle.fail_fast() detects them, otherwise the search only ends when
+    a limit is reached.  Unless puzzle is already solved, raise
+    ValueError if it has more than one blank or repeated tiles.
+
+    If expanding more than max_nodes nodes or searching for more than
+    max_seconds seconds would be needed, or cancel is found to be set,
+    give up and return a SearchInterrupted instead.
+
+    If stats is a SearchStats, it collects statistics on the search.
+
+    @type puzzle: MNPuzzle | FlatMNPuzzle
+    @type max_nodes: int | None
+    @type max_seconds: float | None
+    @type cancel: CancelToken | Event | None
+    @type stats: SearchStats | None
+    @rtype: PuzzleNode | SearchInterrupted
+
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+    >>> sol = ida_star_solve(MNPuzzle(start_grid, target_grid))
+    >>> sol.puzzle.from_grid == target_grid
+    True
+    >>> moves = 0
+    >>> while sol.parent:
+    ...     moves, sol = moves + 1, sol.parent
+    >>> moves
+    3
+    >>> from mn_puzzle import MNContext
+    >>> sol = ida_star_solve(MNContext(target_grid).puzzle(start_grid))
+    >>> set(type(node.puzzle).__name__ for node in sol.path())
+    {'FlatMNPuzzle'}
+    >>> ida_star_solve(MNPuzzle((("1", "2"),), (("1", "2"),))).parent is None
+    True
+    >>> ida_star_solve(MNPuzzle((("a", "a", "*"),), (("a", "*", "a"),)))
+    Traceback (most recent call last):
+    ...
+    ValueError: ida_star_solve needs one blank and distinct tiles
+    """
+    if puzzle.is_solved():
+        return PuzzleNode(puzzle)
+    budget = _make_budget(max_nodes, max_seconds, cancel)
+    n, m = puzzle.n, puzzle.m
+    tiles = [tile for row in puzzle.from_grid for tile in row]
+    target = [tile for row in puzzle.to_grid for tile in row]
+    # with other tiles, or no blank to move, it can never be solved
+    if sorted(tiles) != sorted(target) or "*" not in tiles:
+        return None
+    if tiles.count("*") != 1 or len(set(tiles)) != len(tiles):
+        raise ValueError("ida_star_solve needs one blank and distinct tiles")
+    if puzzle.fail_fast():
+        return None
+
+    # cells each cell swaps with, and distance[tile][cell] from goal
+    neighbours = [[c for c in (i - m, i + m) if 0 <= c < n * m] +
+                  [c for c in (i - 1, i + 1)
+                   if 0 <= c < n * m and c // m == i // m]
+                  for i in range(n * m)]
+    distance = {tile: [abs(i // m - j // m) + abs(i % m - j % m)
+                       for i in range(n * m)]
+                for j, tile in enumerate(target) if tile != "*"}
+    blank = tiles.index("*")
+    h = sum(distance[tile][i] for i, tile in enumerate(tiles) if tile != "*")
+    # cells the blank moved to, in order
+    moves = []
+
+    def search(blank, g, h, bound, previous):
+        # Return -1 once solved with moves holding the path, -2 once
+        # budget runs out, otherwise the smallest f that exceeded bound
+        # below this point.
+        f = g + h
+        if f > bound:
+            return f
+        if h == 0:
+            return -1
+        if budget is not None and budget.spend(g):
+            return -2
+        if stats is not None:
+            # the path down to here stands in for the frontier
+            stats.expanded(g, g + 1)
+        minimum = None
+        for cell in neighbours[blank]:
+            if cell == previous:
+                continue # never undo the move just made
+            tile = tiles[cell]
+            tiles[blank], tiles[cell] = tile, "*"
+            moves.append(cell)
+            if stats is not None:
+                stats.nodes_generated += 1
+            t = search(cell, g + 1,
+                       h + distance[tile][blank] - distance[tile][cell],
+                       bound, blank)
+            if t < 0:
+                return t
+            moves.pop()
+            tiles[blank], tiles[cell] = "*", tile
+            if minimum is None or t < minimum:
+                minimum = t
+        return minimum
+
+    bound = h
+    while bound is not None and bound >= 0:
+        bound = search(blank, 0, h, bound, None)
+    if bound is None:
+        return None
+    if bound == -2:
+        return budget.interrupted(len(moves))
+
+    # replay the moves from the start grid to build the path, labelling
+    # each node with the tile that slid
+    current = PuzzleNode(puzzle)
+    tiles = [tile for row in puzzle.from_grid for tile in row]
+    for cell in moves:
+        tile = tiles[cell]
+        tiles[blank], tiles[cell] = tile, "*"
+        blank = cell
+        grid = tuple(tuple(tiles[r * m:(r + 1) * m]) for r in range(n))
+        if isinstance(puzzle, FlatMNPuzzle):
+            extension = puzzle._context.puzzle(grid)
+        else:
+            extension = type(puzzle)(grid, puzzle.to_grid)
+        current = PuzzleNode(extension, parent=current, move=tile)
+    return _link_path(current)
+
+
+
+@_collects_stats
+def parallel_depth_first_solve(puzzle, workers=None, split_depth=2,
+                               max_nodes=None, max_seconds=None, cancel=None,
+                               stats=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child containing an extension of the puzzle
+    in its parent. Return None if this is not possible.
+
+    The tree is expanded breadth first for split_depth levels, then the
+    subtrees below that level are searched depth first by a pool of
+    worker processes (one per CPU if workers is None).  Once one
+    subtree yields a solution the others are abandoned.  Each subtree's
+    puzzle is pickled to reach its worker, so this pays off when that
+    is cheap next to searching the subtree.
+
+    If searching for more than max_seconds seconds would be needed, any
+    subtree needs more than max_nodes nodes expanded, or cancel is found
+    to be set, give up and return a SearchInterrupted instead, counting
+    the nodes expanded by every worker.
+
+    If stats is a SearchStats, it collects statistics on the search,
+    summed over the workers.
+
+    @type puzzle: Puzzle
+    @type workers: int | None
+    @type split_depth: int
+    @type max_nodes: int | None
+    @type max_seconds: float | None
+    @type cancel: CancelToken | Event | None
+    @type stats: SearchStats | None
+    @rtype: PuzzleNode | SearchInterrupted
+    """
+    start = monotonic()
+    deadline = None if max_seconds is None else start + max_seconds
+    is_solved, fail_fast, extensions = _calls(stats)
+    root = PuzzleNode(puzzle)
+    if is_solved(puzzle):
+        return root
+    frontier = [root]
+    seen = {puzzle.state_key()}
+
+    # split the tree up: the nodes split_depth moves from the root
+    for depth in range(split_depth):
+        nextFrontier = []
+        for current in frontier:
+            if fail_fast(current.puzzle):
+                continue
+            if stats is not None:
+                stats.expanded(depth, len(frontier) + len(nextFrontier))
+            for extension in extensions(current.puzzle):
+                key = extension.state_key()
+                if key not in seen:
+                    seen.add(key)
+                    newNode = PuzzleNode(extension, parent=current)
+                    if is_solved(extension):
+                        return _link_path(newNode)
+                    nextFrontier.append(newNode)
+                elif stats is not None:
+                    stats.duplicates += 1
+        frontier = nextFrontier
+    if len(frontier) == 0:
+        return None
+
+    stop = multiprocessing.Event()
+    executor = ProcessPoolExecutor(max_workers=workers,
+                                   initializer=_start_worker,
+                                   initargs=(stop,))
+    try:
+        # a subtree's ladder must not pass back through its ancestors
+        futures = {executor.submit(_solve_subtree, node.puzzle,
+                                   [x.puzzle.state_key()
+                                    for x in node.path()[:-1]],
+                                   max_nodes, deadline, stats is not None):
+                   node for node in frontier}
+        pending, stopped, nodes = set(futures), None, 0
+        while pending:
+            # wake up now and then to notice cancel being set
+            done, pending = wait(pending, timeout=0.05,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                outcome, subtree_stats, subtree_nodes = future.result()
+                nodes += subtree_nodes
+                if stats is not None:
+                    stats.merge(subtree_stats, split_depth)
+                if isinstance(outcome, list):
+                    stop.set() # tell running workers to give up
+                    # rebuild the worker's path below its subtree's root
+                    return _extend_path(futures[future], outcome[1:])
+                if outcome is not None and stopped is None:
+                    stopped = outcome
+            if cancel is not None and cancel.is_set():
+                stop.set()
+                # count the nodes of the workers already running once
+                # they notice, and never start the rest
+                for future in pending:
+                    future.cancel()
+                for future in wait(pending)[0]:
+                    if not future.cancelled():
+                        nodes += future.result()[2]
+                return SearchInterrupted("cancelled", nodes,
+                                         monotonic() - start)
+        if stopped is not None:
+            # some subtree was not searched to the end
+            return SearchInterrupted(stopped.reason, nodes,
+                                     monotonic() - start, stopped.depth,
+                                     stopped.frontier)
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+    return None
+
+
+# Event that is set once any worker of parallel_depth_first_solve has
+# found a solution, or once solve_many is cancelled or done; each
+# worker process receives its own handle
+_stop = None
+
+
+def _start_worker(stop):
+    # Initialise a parallel_depth_first_solve or solve_many worker
+    # process.
+    #
+    # @type stop: Event
+    # @rtype: None
+    global _stop
+    _stop = stop
+
+
+def _solve_subtree(puzzle, ancestors, max_nodes, deadline, collect):
+    # Return the puzzles from puzzle down to a solution found depth
+    # first without reaching the state keys in ancestors, None if there
+    # is none, or a SearchInterrupted if max_nodes or the monotonic()
+    # deadline is reached or another worker found a solution first;
+    # with the SearchStats of the search if collect, otherwise None,
+    # and the number of nodes expanded.
+    #
+    # @type puzzle: Puzzle
+    # @type ancestors: list[object]
+    # @type max_nodes: int | None
+    # @type deadline: float | None
+    # @type collect: bool
+    # @rtype: (list[Puzzle] | SearchInterrupted | None, SearchStats | None,
+    #         int)
+    max_seconds = None if deadline is None else deadline - monotonic()
+    stats = SearchStats() if collect else None
+    if stats is not None:
+        stats.begin()
+    budget = _Budget(max_nodes, max_seconds, _stop)
+    node = _depth_first_search(puzzle, budget, stats, ancestors)
+    if stats is not None:
+        stats.end()
+    if isinstance(node, PuzzleNode):
+        return _path_puzzles(node), stats, budget.nodes
+    return node, stats, budget.nodes
+
+
+def _path_puzzles(node):
+    # Return the puzzles on the path from the root down to node, which
+    # unlike node itself can be pickled without the rest of the tree.
+    #
+    # @type node: PuzzleNode
+    # @rtype: list[Puzzle]
+    return [x.puzzle for x in node.path()]
+
+
+def _extend_path(node, puzzles):
+    # Return the last of a chain of new PuzzleNodes holding puzzles,
+    # hung below node.
+    #
+    # @type node: PuzzleNode
+    # @type puzzles: list[Puzzle]
+    # @rtype: PuzzleNode
+    for extension in puzzles:
+        node = PuzzleNode(extension, parent=node)
+    return _link_path(node)
+
+
+def _link_path(node):
+    # Make each node on the path from the root down to node the only
+    # child of its parent, and return node.  The solvers only link nodes
+    # to their parents while searching, so this is the one path that
+    # gets children.
+    #
+    # @type node: PuzzleNode
+    # @rtype: PuzzleNode
+    child, parent = node, node.parent
+    while parent is not None:
+        parent.children = [child]
+        child, parent = parent, parent.parent
+    return node
+
+
+def solve_many(puzzles, strategy=depth_first_solve, workers=None,
+               timeout=None, max_nodes=None, ordered=True, cancel=None):
+    """
+    Solve each of puzzles with strategy on a pool of worker processes
+    (one per CPU if workers is None, none at all if workers is 0),
+    yielding a SolveResult for each as soon as it is ready: in the
+    order of puzzles if ordered, otherwise in the order they finish.
+
+    Each search is stopped after timeout seconds or max_nodes nodes
+    expanded, if given, by passing them to strategy as max_seconds and
+    max_nodes; such a result has timed_out set.  A strategy that does
+    not take max_seconds, such as exact_cover_solve, is stopped by a
+    timer signal instead where the platform has one (in worker
+    processes, or inline in the main thread); one that does not take
+    max_nodes is not limited in nodes.  strategy and the puzzles are
+    pickled to reach the workers, so strategy must be a module-level
+    function or a functools.partial of one.
+
+    An exception raised while solving one puzzle is kept in that
+    puzzle's SolveResult as error, and the other puzzles carry on.
+
+    Once cancel is found to be set no more results are yielded,
+    puzzles not yet started are dropped, and the searches under way
+    are told to stop through the cancel argument of strategy, if it
+    takes one.  A strategy without one runs on until it finishes or
+    times out.
+
+    @type puzzles: iterable[Puzzle]
+    @type strategy: (Puzzle) -> PuzzleNode | None
+    @type workers: int | None
+    @type timeout: float | None
+    @type max_nodes: int | None
+    @type ordered: bool
+    @type cancel: CancelToken | Event | None
+    @rtype: generator[SolveResult]
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cat", "cot", "cog", "dog"}
+    >>> jobs = [WordLadderPuzzle("cat", "dog", ws),
+    ...         WordLadderPuzzle("cat", "pig", ws)]
+    >>> [r.solution is not None for r in solve_many(jobs, workers=0)]
+    [True, False]
+    >>> from sudoku_puzzle import SudokuPuzzle, exact_cover_solve
+    >>> grid = [["A", "*", "*", "*"], ["*", "*", "*", "*"],
+    ...         ["*", "*", "*", "*"], ["*", "*", "*", "*"]]
+    >>> jobs = [SudokuPuzzle(4, grid, {"A", "B", "C", "D"}), jobs[0]]
+    >>> results = list(solve_many(jobs, exact_cover_solve, workers=0,
+    ...                           timeout=1))
+    >>> results[0].solution.puzzle.is_solved(), results[0].error
+    (True, None)
+    >>> results[1].solution, type(results[1].error).__name__
+    (None, 'AttributeError')
+    """
+    # only pass on the limits strategy takes
+    limits, alarm = {}, None
+    if timeout is not None:
+        if _accepts(strategy, "max_seconds"):
+            limits["max_seconds"] = timeout
+        else:
+            alarm = timeout
+    if max_nodes is not None and _accepts(strategy, "max_nodes"):
+        limits["max_nodes"] = max_nodes
+
+    if workers == 0:
+        if cancel is not None and _accepts(strategy, "cancel"):
+            limits["cancel"] = cancel
+        for index, puzzle in enumerate(puzzles):
+            if cancel is not None and cancel.is_set():
+                return
+            yield _finish(index, puzzle,
+                          _run(strategy, puzzle, limits, alarm))
+        return
+
+    # the workers see cancel through this Event, set on their behalf
+    stop = multiprocessing.Event()
+    if cancel is not None and _accepts(strategy, "cancel"):
+        limits["cancel"] = None # _run passes the worker's handle on
+    executor = ProcessPoolExecutor(max_workers=workers,
+                                   initializer=_start_worker,
+                                   initargs=(stop,))
+    try:
+        futures, order = {}, []
+        for index, puzzle in enumerate(puzzles):
+            future = executor.submit(_run, strategy, puzzle, limits, alarm)
+            futures[future] = (index, puzzle)
+            order.append(future)
+        pending, finished, position = set(futures), {}, 0
+        while pending:
+            if cancel is not None and cancel.is_set():
+                return
+            # wake up now and then to notice cancel being set
+            done, pending = wait(pending, timeout=0.05,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    finished[future] = future.result()
+                except Exception as error: # e.g. an unpicklable outcome
+                    finished[future] = error, 0.0
+            # the results to yield now
+            if ordered:
+                ready = []
+                while position < len(order) and order[position] in finished:
+                    ready.append(order[position])
+                    position += 1
+            else:
+                ready = list(done)
+            for future in ready:
+                if cancel is not None and cancel.is_set():
+                    return
+                index, puzzle = futures[future]
+                yield _finish(index, puzzle, finished.pop(future))
+    finally:
+        stop.set() # stop the searches under way
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _accepts(strategy, name):
+    # Return whether strategy takes a keyword argument called name.
+    #
+    # @type strategy: function
+    # @type name: str
+    # @rtype: bool
+    try:
+        parameters = inspect.signature(strategy).parameters
+    except (TypeError, ValueError):
+        return False
+    return name in parameters or any(
+        parameter.kind == parameter.VAR_KEYWORD
+        for parameter in parameters.values())
+
+
+class _Alarm(Exception):
+    # Raised by the timer signal that stops a strategy that cannot stop
+    # itself.
+    pass
+
+
+def _ring(signum, frame):
+    # Handle the timer signal _run sets.
+    #
+    # @type signum: int
+    # @type frame: frame
+    # @rtype: None
+    raise _Alarm()
+
+
+def _run(strategy, puzzle, limits, alarm=None):
+    # Return (outcome, seconds) of solving puzzle with strategy within
+    # limits, where outcome is the puzzles on the path to the solution,
+    # None, a SearchInterrupted or the exception strategy raised.  If
+    # alarm is a number of seconds, a timer signal stops strategy then,
+    # where that is possible.
+    #
+    # @type strategy: (Puzzle) -> PuzzleNode | None
+    # @type puzzle: Puzzle
+    # @type limits: dict[str, int | float]
+    # @type alarm: float | None
+    # @rtype: (list[Puzzle] | SearchInterrupted | Exception | None, float)
+    if "cancel" in limits and limits["cancel"] is None:
+        # in a solve_many worker, which stops when told to
+        limits = dict(limits, cancel=_stop)
+    timed = (alarm is not None and hasattr(signal, "setitimer") and
+             threading.current_thread() is threading.main_thread())
+    if timed:
+        handler = signal.signal(signal.SIGALRM, _ring)
+        signal.setitimer(signal.ITIMER_REAL, alarm)
+    start = monotonic()
+    try:
+        outcome = strategy(puzzle, **limits)
+        if isinstance(outcome, PuzzleNode):
+            outcome = _path_puzzles(outcome)
+        elif isinstance(outcome, Puzzle):
+            outcome = [outcome] # a solved puzzle, as propagation_solve gives
+    except _Alarm:
+        outcome = SearchInterrupted("max_seconds", 0, monotonic() - start)
+    except Exception as error:
+        outcome = error
+    finally:
+        if timed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, handler)
+    return outcome, monotonic() - start
+
+
+def _finish(index, puzzle, result):
+    # Return the SolveResult for the result of _run on puzzle.
+    #
+    # @type index: int
+    # @type puzzle: Puzzle
+    # @type result: (list[Puzzle] | SearchInterrupted | Exception | None,
+    #               float)
+    # @rtype: SolveResult
+    outcome, seconds = result
+    if isinstance(outcome, Exception):
+        return SolveResult(index, puzzle, None, None, seconds, outcome)
+    if isinstance(outcome, list):
+        root = PuzzleNode(outcome[0])
+        return SolveResult(index, puzzle, _extend_path(root, outcome[1:]),
+                           None, seconds)
+    if isinstance(outcome, SearchInterrupted):
+        return SolveResult(index, puzzle, None, outcome, seconds)
+    return SolveResult(index, puzzle, None, None, seconds)
+
+
+class SolveResult:
+    """
+    The outcome of solving one puzzle in solve_many.
+
+    === Attributes ===
+    @type index: int
+        position of the puzzle among those given to solve_many
+    @type puzzle: Puzzle
+        the puzzle that was solved
+    @type solution: PuzzleNode | None
+        last node of the path to the solution, or None if there is no
+        solution or the search was stopped
+    @type interrupted: SearchInterrupted | None
+        why the search was stopped, or None if it ran to the end
+    @type seconds: float
+        time taken by the search
+    @type error: Exception | None
+        what the search raised, or None if it did not raise
+    """
+
+    def __init__(self, index, puzzle, solution, interrupted, seconds,
+                 error=None):
+        """
+        Create a new SolveResult self.
+
+        @type self: SolveResult
+        @type index: int
+        @type puzzle: Puzzle
+        @type solution: PuzzleNode | None
+        @type interrupted: SearchInterrupted | None
+        @type seconds: float
+        @type error: Exception | None
+        @rtype: None
+        """
+        self.index, self.puzzle, self.solution = index, puzzle, solution
+        self.interrupted, self.seconds = interrupted, seconds
+        self.error = error
+
+    @property
+    def timed_out(self):
+        """
+        Return whether the search ran out of time or nodes.
+
+        @type self: SolveResult
+        @rtype: bool
+        """
+        return self.interrupted is not None
+
+
+class SearchInterrupted:
+    """
+    What a solver returns in place of a solution when it is stopped
+    before finishing.  It is false in a boolean context, like None.
+
+    === Attributes ===
+    @type reason: str
+        "max_nodes", "max_seconds" or "cancelled", why the search stopped
+    @type nodes: int
+        nodes expanded before stopping
+    @type seconds: float
+        time spent before stopping
+    @type depth: int
+        most moves from the start of any node expanded
+    @type frontier: int
+        nodes waiting to be expanded when the search stopped, or for
+        depth_first_solve and ida_star_solve the nodes on the search
+        stack, as in SearchStats.peak_frontier
+    @type stats: SearchStats | None
+        the statistics collected, if the solver was given any to collect
+    """
+
+    def __init__(self, reason, nodes, seconds, depth=0, frontier=0):
+        """
+        Create a new SearchInterrupted self.
+
+        @type self: SearchInterrupted
+        @type reason: str
+        @type nodes: int
+        @type seconds: float
+        @type depth: int
+        @type frontier: int
+        @rtype: None
+        """
+        self.reason, self.nodes, self.seconds = reason, nodes, seconds
+        self.depth, self.frontier = depth, frontier
+        self.stats = None
+
+    def __bool__(self):
+        """
+        Return False, as a search that was stopped found no solution.
+
+        @type self: SearchInterrupted
+        @rtype: bool
+
+        >>> bool(SearchInterrupted("max_nodes", 10, 0.5))
+        False
+        """
+        return False
+
+    def __str__(self):
+        """
+        Return a human-readable string representing SearchInterrupted self.
+
+        @type self: SearchInterrupted
+        @rtype: str
+
+        >>> print(SearchInterrupted("max_nodes", 10, 0.5))
+        stopped by max_nodes after 10 nodes in 0.500 seconds
+        """
+        return "stopped by {} after {} nodes in {:.3f} seconds".format(
+            self.reason, self.nodes, self.seconds)
+
+
+# the untimed Puzzle calls that _calls hands out without stats
+_UNTIMED = (methodcaller("is_solved"), methodcaller("fail_fast"),
+            methodcaller("extensions"))
+
+
+def _calls(stats):
+    # Return functions making the is_solved, fail_fast and extensions
+    # calls on a puzzle, timed into stats unless it is None.
+    #
+    # @type stats: SearchStats | None
+    # @rtype: ((Puzzle) -> bool, (Puzzle) -> bool,
+    #          (Puzzle) -> iterator[Puzzle])
+    if stats is None:
+        return _UNTIMED
+    return stats.is_solved, stats.fail_fast, stats.extensions
+
+
+class SearchStats:
+    """
+    Statistics on a search, collected by the puzzle_tools solvers given
+    one as their stats argument.
+
+    === Attributes ===
+    @type nodes_expanded: int
+        nodes whose extensions were generated
+    @type nodes_generated: int
+        extensions generated
+    @type duplicates: int
+        extensions dropped because their state was already reached
+    @type peak_frontier: int
+        most nodes waiting to be expanded at once; depth_first_solve
+        and ida_star_solve build extensions lazily and never hold their
+        unexpanded siblings, so for them this is the most nodes on the
+        search stack at once, which is one more than max_depth
+    @type max_depth: int
+        most moves from the start of any node expanded
+    @type extensions_seconds: float
+        time spent generating extensions
+    @type is_solved_seconds: float
+        time spent in is_solved
+    @type fail_fast_seconds: float
+        time spent in fail_fast
+    @type seconds: float
+        time the search took, or has taken so far
+    """
+
+    def __init__(self, callback=None, every=10000):
+        """
+        Create a new SearchStats self, which if callback is given passes
+        itself to callback after every every nodes expanded and once
+        the search is over.
+
+        @type self: SearchStats
+        @type callback: (SearchStats) -> None | None
+        @type every: int
+        @rtype: None
+        """
+        self.nodes_expanded = self.nodes_generated = self.duplicates = 0
+        self.peak_frontier = self.max_depth = 0
+        self.extensions_seconds = self.is_solved_seconds = 0.0
+        self.fail_fast_seconds = self.seconds = 0.0
+        self._callback, self._every = callback, every
+        self._start = None
+
+    def __getstate__(self):
+        """
+        Return the state of SearchStats self to pickle, leaving out the
+        callback.
+
+        @type self: SearchStats
+        @rtype: dict
+        """
+        state = self.__dict__.copy()
+        state["_callback"] = None
+        return state
+
+    @property
+    def nodes_per_second(self):
+        """
+        Return the nodes expanded per second of search.
+
+        @type self: SearchStats
+        @rtype: float
+
+        >>> stats = SearchStats()
+        >>> stats.nodes_expanded, stats.seconds = 50, 0.5
+        >>> stats.nodes_per_second
+        100.0
+        """
+        if self.seconds == 0:
+            return 0.0
+        return self.nodes_expanded / self.seconds
+
+    def begin(self):
+        """
+        Start timing the search.
+
+        @type self: SearchStats
+        @rtype: None
+        """
+        self._start = perf_counter()
+
+    def end(self):
+        """
+        Stop timing the search and report to the callback, if any.
+
+        @type self: SearchStats
+        @rtype: None
+        """
+        self.seconds = perf_counter() - self._start
+        if self._callback is not None:
+            self._callback(self)
+
+    def expanded(self, depth, frontier):
+        """
+        Count a node depth moves from the start being expanded, with
+        frontier nodes, it included, waiting to be expanded.
+
+        @type self: SearchStats
+        @type depth: int
+        @type frontier: int
+        @rtype: None
+        """
+        self.nodes_expanded += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+        if self._callback is not None and \
+                self.nodes_expanded % self._every == 0:
+            self.seconds = perf_counter() - self._start
+            self._callback(self)
+
+    def is_solved(self, puzzle):
+        """
+        Return puzzle.is_solved(), timing it.
+
+        @type self: SearchStats
+        @type puzzle: Puzzle
+        @rtype: bool
+        """
+        start = perf_counter()
+        solved = puzzle.is_solved()
+        self.is_solved_seconds += perf_counter() - start
+        return solved
+
+    def fail_fast(self, puzzle):
+        """
+        Return puzzle.fail_fast(), timing it.
+
+        @type self: SearchStats
+        @type puzzle: Puzzle
+        @rtype: bool
+        """
+        start = perf_counter()
+        failed = puzzle.fail_fast()
+        self.fail_fast_seconds += perf_counter() - start
+        return failed
+
+    def extensions(self, puzzle):
+        """
+        Yield puzzle.extensions(), timing and counting each one.
+
+        @type self: SearchStats
+        @type puzzle: Puzzle
+        @rtype: generator[Puzzle]
+        """
+        start = perf_counter()
+        moves = iter(puzzle.extensions())
+        while True:
+            try:
+                extension = next(moves)
+            except StopIteration:
+                self.extensions_seconds += perf_counter() - start
+                return
+            self.extensions_seconds += perf_counter() - start
+            self.nodes_generated += 1
+            yield extension
+            start = perf_counter()
+
+    def merge(self, other, depth):
+        """
+        Add to SearchStats self the counts and times in other, taken
+        from a search starting depth moves from the start of self's.
+
+        @type self: SearchStats
+        @type other: SearchStats
+        @type depth: int
+        @rtype: None
+        """
+        self.nodes_expanded += other.nodes_expanded
+        self.nodes_generated += other.nodes_generated
+        self.duplicates += other.duplicates
+        self.peak_frontier = max(self.peak_frontier, other.peak_frontier)
+        self.max_depth = max(self.max_depth, depth + other.max_depth)
+        self.extensions_seconds += other.extensions_seconds
+        self.is_solved_seconds += other.is_solved_seconds
+        self.fail_fast_seconds += other.fail_fast_seconds
+
+    def as_dict(self):
+        """
+        Return the statistics in SearchStats self by name.
+
+        @type self: SearchStats
+        @rtype: dict[str, int | float]
+
+        >>> sorted(SearchStats().as_dict())[:3]
+        ['duplicates', 'extensions_seconds', 'fail_fast_seconds']
+        """
+        return {"nodes_expanded": self.nodes_expanded,
+                "nodes_generated": self.nodes_generated,
+                "duplicates": self.duplicates,
+                "peak_frontier": self.peak_frontier,
+                "max_depth": self.max_depth,
+                "extensions_seconds": self.extensions_seconds,
+                "is_solved_seconds": self.is_solved_seconds,
+                "fail_fast_seconds": self.fail_fast_seconds,
+                "seconds": self.seconds,
+                "nodes_per_second": self.nodes_per_second}
+
+    def __str__(self):
+        """
+        Return a human-readable string representing SearchStats self.
+
+        @type self: SearchStats
+        @rtype: str
+        """
+        return "\n".join("{}: {}".format(name, value)
+                         for name, value in self.as_dict().items())
+
+
+def _make_budget(max_nodes, max_seconds, cancel):
+    # Return a _Budget for the limits given, or None if there are none.
+    #
+    # @type max_nodes: int | None
+    # @type max_seconds: float | None
+    # @type cancel: CancelToken | Event | None
+    # @rtype: _Budget | None
+    if max_nodes is None and max_seconds is None and cancel is None:
+        return None
+    return _Budget(max_nodes, max_seconds, cancel)
+
+
+class _Budget:
+    # Limits on one search, charged once per node expanded.
+    #
+    # === Attributes ===
+    # @type max_nodes: int | None
+    # @type deadline: float | None
+    #     monotonic() time after which to stop
+    # @type cancel: CancelToken | Event | None
+    # @type start: float
+    # @type nodes: int
+    #     nodes charged so far
+    # @type depth: int
+    #     deepest node charged so far
+    # @type reason: str | None
+    #     why the search must stop, if it must
+
+    def __init__(self, max_nodes, max_seconds, cancel):
+        self.max_nodes, self.cancel = max_nodes, cancel
+        self.start = monotonic()
+        self.deadline = None if max_seconds is None else \
+            self.start + max_seconds
+        self.nodes, self.depth, self.reason = 0, 0, None
+
+    def spend(self, depth):
+        # Charge for expanding one more node, depth moves from the
+        # start, and return whether the search must stop instead.
+        #
+        # @type depth: int
+        # @rtype: bool
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            self.reason = "max_nodes"
+        elif self.deadline is not None and monotonic() > self.deadline:
+            self.reason = "max_seconds"
+        # checking an Event can mean taking a lock, so only do it now
+        # and then
+        elif self.cancel is not None and self.nodes % 64 == 0 and \
+                self.cancel.is_set():
+            self.reason = "cancelled"
+        else:
+            self.nodes += 1
+            if depth > self.depth:
+                self.depth = depth
+        return self.reason is not None
+
+    def interrupted(self, frontier):
+        # Return the SearchInterrupted for why the search stopped, with
+        # frontier nodes left to expand.
+        #
+        # @type frontier: int
+        # @rtype: SearchInterrupted
+        return SearchInterrupted(self.reason, self.nodes,
+                                 monotonic() - self.start, self.depth,
+                                 frontier)
+
+
+class CancelToken:
+    """
+    A flag that one thread sets to ask a search running in another to
+    stop.  A multiprocessing Event serves the same purpose across
+    processes.
+    """
+
+    def __init__(self):
+        """
+        Create a new CancelToken self that is not yet set.
+
+        @type self: CancelToken
+        @rtype: None
+        """
+        self._set = False
+
+    def cancel(self):
+        """
+        Ask the searches watching CancelToken self to stop.
+
+        @type self: CancelToken
+        @rtype: None
+
+        >>> token = CancelToken()
+        >>> token.cancel()
+        >>> token.is_set()
+        True
+        """
+        self._set = True
+
+    def is_set(self):
+        """
+        Return whether CancelToken self has been cancelled.
+
+        @type self: CancelToken
+        @rtype: bool
+
+        >>> CancelToken().is_set()
+        False
+        """
+        return self._set
+
+
+
 # Class PuzzleNode helps build trees of PuzzleNodes that have
 # an arbitrary number of children, and a parent.
 class PuzzleNode:
     """
     A Puzzle configuration that refers to other configurations that it
     can be extended to.
+
+    Nodes only hold what they were given: the solvers link each node to
+    its parent as they search, and fill in children only along the path
+    they return, so the rest of the explored tree can be freed.  A
+    node's children list is made the first time it is asked for.
+
+    === Attributes ===
+    @type puzzle: Puzzle | None
+        the configuration at this node
+    @type parent: PuzzleNode | None
+        the node whose puzzle this one's extends, if any
+    @type move: object
+        an optional label for the move from parent to here
+    @type children: list[PuzzleNode]
+        the nodes whose puzzles extend this one's
     """
+    __slots__ = ("puzzle", "parent", "move", "_children")
 
-    def __init__(self, puzzle=None, children=None, parent=None):
+    def __init__(self, puzzle=None, children=None, parent=None, move=None):
         """
         Create a new puzzle node self with configuration puzzle.
 
         @type self: PuzzleNode
         @type puzzle: Puzzle | None
-        @type children: list[PuzzleNode]
+        @type children: list[PuzzleNode] | None
         @type parent: PuzzleNode | None
+        @type move: object
         @rtype: None
         """
-        self.puzzle, self.parent = puzzle, parent
-        if children is None:
-            self.children = []
-        else:
-            self.children = children[:]
+        self.puzzle, self.parent, self.move = puzzle, parent, move
+        self._children = None if children is None else children[:]
+
+    @property
+    def children(self):
+        """
+        Return the children of PuzzleNode self.
+
+        @type self: PuzzleNode
+        @rtype: list[PuzzleNode]
+
+        >>> node = PuzzleNode()
+        >>> node.children
+        []
+        >>> node.children.append(PuzzleNode(parent=node))
+        >>> len(node.children)
+        1
+        """
+        if self._children is None:
+            self._children = []
+        return self._children
+
+    @children.setter
+    def children(self, children):
+        """
+        Set the children of PuzzleNode self to children.
+
+        @type self: PuzzleNode
+        @type children: list[PuzzleNode]
+        @rtype: None
+        """
+        self._children = children
 
     def __eq__(self, other):
         """
-        Return whether Puzzle self is equivalent to other
+        Return whether Puzzle self is equivalent to other: whether they
+        are nodes of the same type holding equal puzzles.  Neither node's
+        parent nor children are compared.
 
         @type self: PuzzleNode
         @type other: PuzzleNode | Any
@@ -142,16 +1368,88 @@ class PuzzleNode:
         >>> pn1.__eq__(pn3)
         False
         """
-        return (type(self) == type(other) and
-                self.puzzle == other.puzzle and
-                all([x in self.children for x in other.children]) and
-                all([x in other.children for x in self.children]))
+        return type(self) == type(other) and self.puzzle == other.puzzle
 
     def __str__(self):
         """
-        Return a human-readable string representing PuzzleNode self.
+        Return a human-readable string representing PuzzleNode self:
+        its puzzle followed by the string of each of its children.  The
+        tree is walked with a stack rather than recursion, so deep trees
+        are no problem.
+
+        @type self: PuzzleNode
+        @rtype: str
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> words = {"on", "no", "oo"}
+        >>> root = PuzzleNode(WordLadderPuzzle("on", "no", words))
+        >>> root.children.append(PuzzleNode(WordLadderPuzzle("oo", "no", \
+words), parent=root))
+        >>> print(root)
+        From Word = on
+        To Word   = no
+        <BLANKLINE>
+        From Word = oo
+        To Word   = no
+        <BLANKLINE>
+        <BLANKLINE>
+        """
+        parts = []
+        # strings still to add, and nodes still to render, last first
+        stack = [self]
+        while len(stack) > 0:
+            item = stack.pop()
+            if isinstance(item, PuzzleNode):
+                parts.append("{}\n\n".format(item.puzzle))
+                children = item._children or []
+                for i in range(len(children) - 1, -1, -1):
+                    stack.append(children[i])
+                    if i > 0:
+                        stack.append("\n")
+            else:
+                parts.append(item)
+        return "".join(parts)
+
+    def path(self):
+        """
+        Return the nodes on the path from the root down to PuzzleNode
+        self, following parent links.
+
+        @type self: PuzzleNode
+        @rtype: list[PuzzleNode]
+
+        >>> root = PuzzleNode("a")
+        >>> leaf = PuzzleNode("c", parent=PuzzleNode("b", parent=root))
+        >>> [node.puzzle for node in leaf.path()]
+        ['a', 'b', 'c']
+        """
+        path = []
+        node = self
+        while node is not None:
+            path.append(node)
+            node = node.parent
+        path.reverse()
+        return path
+
+    def path_str(self):
+        """
+        Return a human-readable string of the puzzles on the path from
+        the root down to PuzzleNode self, the same as the root's string
+        once the path is its only branch.
+
+        @type self: PuzzleNode
+        @rtype: str
 
-        # doctest not feasible.
+        >>> root = PuzzleNode("a")
+        >>> leaf = PuzzleNode("c", parent=PuzzleNode("b", parent=root))
+        >>> print(leaf.path_str())
+        a
+        <BLANKLINE>
+        b
+        <BLANKLINE>
+        c
+        <BLANKLINE>
+        <BLANKLINE>
         """
-        return "{}\n\n{}".format(self.puzzle,
-                                 "\n".join([str(x) for x in self.children]))
+        return "".join(["{}\n\n".format(node.puzzle)
+                        for node in self.path()])
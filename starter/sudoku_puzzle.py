@@ -1,6 +1,8 @@
 #testing 123...123...123
 
 from puzzle import Puzzle
+from puzzle_tools import PuzzleNode
+from functools import lru_cache
 
 
 class SudokuPuzzle(Puzzle):
@@ -29,6 +31,33 @@ class SudokuPuzzle(Puzzle):
 
         self._n, self._symbols, self._symbol_set = n, symbols, symbol_set
 
+        # bit for each symbol, and bitmasks of the symbols used so far in
+        # each row, column and subsquare; extensions derive a child's
+        # masks from these instead of rescanning the grid
+        self._bit = {symbol: 1 << i
+                     for i, symbol in enumerate(sorted(symbol_set))}
+        self._row_used, self._column_used = [0] * n, [0] * n
+        self._subsquare_used = [0] * n
+        self._empty = 0 # number of "*" positions
+        self._consistent = True # no symbol repeated within a unit
+        ss = round(n ** (1 / 2))
+        for r in range(n):
+            for c in range(n):
+                if symbols[r][c] == "*":
+                    self._empty += 1
+                else:
+                    bit, b = self._bit[symbols[r][c]], (r // ss) * ss + c // ss
+                    if (self._row_used[r] | self._column_used[c] |
+                            self._subsquare_used[b]) & bit:
+                        self._consistent = False
+                    self._row_used[r] |= bit
+                    self._column_used[c] |= bit
+                    self._subsquare_used[b] |= bit
+        # position this puzzle filled in from its parent, and whether
+        # the parent was known to fail fast (None if never checked)
+        self._last, self._parent_failed = None, None
+        self._failed = None # cached result of fail_fast
+
     def __eq__(self, other):
         """
         Return whether SudokuPuzzle self is equivalent to other.
@@ -61,6 +90,23 @@ class SudokuPuzzle(Puzzle):
                 self._n == other._n and self._symbols == other._symbols and
                 self._symbol_set == other._symbol_set)
 
+    def state_key(self):
+        """
+        Return a hashable key for the symbols placed in SudokuPuzzle self.
+
+        @type self: SudokuPuzzle
+        @rtype: tuple[tuple[str]]
+
+        >>> r1 = ["A", "B", "C", "D"]
+        >>> r2 = ["D", "C", "B", "A"]
+        >>> r3 = ["*", "D", "*", "*"]
+        >>> r4 = ["*", "*", "*", "*"]
+        >>> s = SudokuPuzzle(4, [r1, r2, r3, r4], {"A", "B", "C", "D"})
+        >>> s.state_key()[2]
+        ('*', 'D', '*', '*')
+        """
+        return tuple(tuple(row) for row in self._symbols)
+
     def __str__(self):
         """
         Return a human-readable string representation of SudokuPuzzle self.
@@ -126,21 +172,17 @@ class SudokuPuzzle(Puzzle):
         >>> s.is_solved()
         False
         """
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # no "*" left and all rows, column, subsquares have correct symbols
-        return (not any("*" in row for row in symbols)) \
-               and all([(self._row_set(i) == self._symbol_set and
-                      self._column_set(j) == self._symbol_set and
-                      self._subsquare_set(i, j) ==
-                      self._symbol_set) for i in range(n) for j in range(n)])
+        # every position filled, and symbols are never repeated in a unit,
+        # so each row, column and subsquare holds all of symbol_set
+        return self._empty == 0 and self._consistent
 
     def extensions(self):
         """
-        Return list of extensions of SudokuPuzzle self.
+        Yield the extensions of SudokuPuzzle self, each built only when
+        it is asked for.
 
         @type self: SudokuPuzzle
-        @rtype: list[SudokuPuzzle]
+        @rtype: generator[SudokuPuzzle]
 
         >>> r1 = ["A", "B", "C", "D"]
         >>> r2 = ["C", "D", "A", "B"]
@@ -159,31 +201,53 @@ class SudokuPuzzle(Puzzle):
         True
         """
         # convenient names
-        symbols, symbol_set, n = self._symbols, self._symbol_set, self._n
-        if not any("*" in row for row in symbols):
-            return []
+        symbols, n = self._symbols, self._n
+        if self._empty == 0:
+            return
         else:
-            # get position of first empty position
-            r = 0 # row with first empty position
-            while "*" not in symbols[r]:
-                r += 1
-            c = symbols[r].index("*") # column with first empty position
+            # get position of first empty position, which comes after
+            # the position this puzzle's parent filled in
+            r, c = (0, 0) if self._last is None else self._last
+            while symbols[r][c] != "*":
+                r, c = (r, c + 1) if c + 1 < n else (r + 1, 0)
 
             # allowed symbols at position (r, c)
-            # A | B == A.union(B)
-            allowed_symbols = (self._symbol_set -
-                               (self._row_set(r) |
-                                self._column_set(c) |
-                                self._subsquare_set(r, c)))
-
-            # list of SudokuPuzzles with each legal digit at position i
-            return_lst = []
-            for symbol in allowed_symbols:
-                new_puzzle = SudokuPuzzle(n, symbols[:r] + \
-                                          [symbols[r][:c] + [symbol] + symbols[r][c+1:]] + \
-                                          symbols[r+1:], symbol_set)
-                return_lst.append(new_puzzle)
-            return return_lst
+            used = self._used(r, c)
+
+            # SudokuPuzzles with each legal digit at position i
+            for symbol in self._bit:
+                if not self._bit[symbol] & used:
+                    yield self._extend(r, c, symbol)
+
+    def _extend(self, r, c, symbol):
+        # Return a new SudokuPuzzle like self with symbol at the empty
+        # position (r, c), its counters derived from self's.
+        #
+        # @type self: SudokuPuzzle
+        # @type r: int
+        # @type c: int
+        # @type symbol: str
+        # @rtype: SudokuPuzzle
+        n, symbols = self._n, self._symbols
+        bit, b = self._bit[symbol], self._subsquare_index(r, c)
+        child = SudokuPuzzle.__new__(SudokuPuzzle)
+        child._n, child._symbol_set, child._bit = n, self._symbol_set, \
+            self._bit
+        # rows other than r are shared with self
+        child._symbols = symbols[:r] + \
+            [symbols[r][:c] + [symbol] + symbols[r][c+1:]] + symbols[r+1:]
+        child._row_used = self._row_used[:]
+        child._row_used[r] |= bit
+        child._column_used = self._column_used[:]
+        child._column_used[c] |= bit
+        child._subsquare_used = self._subsquare_used[:]
+        child._subsquare_used[b] |= bit
+        child._empty = self._empty - 1
+        child._consistent = self._consistent and \
+            not self._used(r, c) & bit
+        child._last, child._parent_failed = (r, c), self._failed
+        child._failed = None
+        return child
 
     # TODO
     # override fail_fast
@@ -214,20 +278,58 @@ class SudokuPuzzle(Puzzle):
         True
         """
 
-        grid = self._symbols
+        if self._failed is None:
+            self._failed = self._find_failure()
+        return self._failed
 
-        for r in range(len(grid)):
-            for c in range(len(grid[r])):
-                if grid[r][c] == "*":
-
-                    allowed_symbols = (self._symbol_set -
-                                       (self._row_set(r) |
-                                        self._column_set(c) |
-                                        self._subsquare_set(r, c)))
-                    if len(allowed_symbols) == 0:
-                        return True
+    def _find_failure(self):
+        # Return whether SudokuPuzzle self is inconsistent or has an
+        # unfilled position with no symbols left.  When self's parent is
+        # known not to fail, only the units of the position self filled
+        # in can have lost symbols, so only those are checked.
+        #
+        # @type self: SudokuPuzzle
+        # @rtype: bool
+        if not self._consistent or self._parent_failed:
+            return True
+        n, grid, full = self._n, self._symbols, (1 << self._n) - 1
+        if self._parent_failed is None:
+            positions = [(r, c) for r in range(n) for c in range(n)]
+        else:
+            r, c = self._last
+            ss = round(n ** (1 / 2))
+            ul_row, ul_col = (r // ss) * ss, (c // ss) * ss
+            positions = [(r, j) for j in range(n)] + \
+                        [(i, c) for i in range(n)] + \
+                        [(ul_row + i, ul_col + j)
+                         for i in range(ss) for j in range(ss)]
+        for (r, c) in positions:
+            if grid[r][c] == "*" and self._used(r, c) == full:
+                return True
         return False
 
+    def _used(self, r, c):
+        # Return bitmask of the symbols in the row, column and subsquare
+        # of position (r, c).
+        #
+        # @type self: SudokuPuzzle
+        # @type r: int
+        # @type c: int
+        # @rtype: int
+        return (self._row_used[r] | self._column_used[c] |
+                self._subsquare_used[self._subsquare_index(r, c)])
+
+    def _subsquare_index(self, r, c):
+        # Return the index of the subsquare of position (r, c), numbering
+        # subsquares row by row.
+        #
+        # @type self: SudokuPuzzle
+        # @type r: int
+        # @type c: int
+        # @rtype: int
+        ss = round(self._n ** (1 / 2))
+        return (r // ss) * ss + c // ss
+
     # some helper methods
     def _row_set(self, r):
         #
@@ -273,6 +375,410 @@ class SudokuPuzzle(Puzzle):
         return set(subsquare_symbols)
 
 
+# a constraint-propagation solver working on candidate bitmasks:
+# bit i of a cell's mask is set while the i-th symbol (in sorted
+# order) may still go in that cell
+@lru_cache(maxsize=None)
+def _layout(n):
+    # Return (units, cell_units, peers) for an nxn grid whose cells are
+    # numbered row by row: the cells of each row, column and subsquare,
+    # the units each cell is in, and the other cells sharing a unit.
+    #
+    # @type n: int
+    # @rtype: (list[list[int]], list[list[int]], list[list[int]])
+    ss = round(n ** (1 / 2))
+    units = [[r * n + c for c in range(n)] for r in range(n)] + \
+            [[r * n + c for r in range(n)] for c in range(n)] + \
+            [[(ul_row + i) * n + ul_col + j
+              for i in range(ss) for j in range(ss)]
+             for ul_row in range(0, n, ss) for ul_col in range(0, n, ss)]
+    cell_units = [[] for _ in range(n * n)]
+    for u in range(len(units)):
+        for cell in units[u]:
+            cell_units[cell].append(u)
+    peers = [sorted(set(c for u in cell_units[cell] for c in units[u]) -
+                    {cell}) for cell in range(n * n)]
+    return units, cell_units, peers
+
+
+def _propagate(candidates, work, n):
+    # Remove each (cell, bit) in work from candidates, following up
+    # naked singles (a cell left with one candidate) and hidden singles
+    # (a symbol left with one place in a unit).  Return False iff some
+    # cell or unit runs out of options.
+    #
+    # @type candidates: list[int]
+    # @type work: list[(int, int)]
+    # @type n: int
+    # @rtype: bool
+    units, cell_units, peers = _layout(n)
+    while work:
+        cell, bit = work.pop()
+        mask = candidates[cell]
+        if not mask & bit:
+            continue
+        mask &= ~bit
+        candidates[cell] = mask
+        if mask == 0:
+            return False
+        if mask & (mask - 1) == 0:
+            # naked single: no peer may keep this symbol
+            for peer in peers[cell]:
+                if candidates[peer] & mask:
+                    work.append((peer, mask))
+        for u in cell_units[cell]:
+            places = [c for c in units[u] if candidates[c] & bit]
+            if len(places) == 0:
+                return False
+            if len(places) == 1:
+                # hidden single: the only place left for bit in unit u
+                rest = candidates[places[0]] & ~bit
+                while rest:
+                    low = rest & -rest
+                    work.append((places[0], low))
+                    rest ^= low
+    return True
+
+
+def _initial_candidates(puzzle):
+    # Return the propagated candidate masks of SudokuPuzzle puzzle's
+    # cells and its symbols in bit order, or None if the symbols placed
+    # already contradict each other.
+    #
+    # @type puzzle: SudokuPuzzle
+    # @rtype: (list[int] | None, list[str])
+    n = puzzle._n
+    symbols = sorted(puzzle._symbol_set)
+    full = (1 << n) - 1
+    candidates = [full] * (n * n)
+    work = []
+    for r in range(n):
+        for c in range(n):
+            if puzzle._symbols[r][c] != "*":
+                keep = 1 << symbols.index(puzzle._symbols[r][c])
+                work.append((r * n + c, full & ~keep))
+    if not _propagate(candidates, [(cell, bit) for cell, rest in work
+                                   for bit in _bits(rest)], n):
+        return None, symbols
+    return candidates, symbols
+
+
+def _bits(mask):
+    # Return the single-bit masks set in mask, lowest first.
+    #
+    # @type mask: int
+    # @rtype: list[int]
+    bits = []
+    while mask:
+        low = mask & -mask
+        bits.append(low)
+        mask ^= low
+    return bits
+
+
+def _to_puzzle(puzzle, candidates, symbols):
+    # Return the SudokuPuzzle like puzzle with each cell whose candidates
+    # are down to one symbol filled in.
+    #
+    # @type puzzle: SudokuPuzzle
+    # @type candidates: list[int]
+    # @type symbols: list[str]
+    # @rtype: SudokuPuzzle
+    n = puzzle._n
+    grid = []
+    for r in range(n):
+        row = []
+        for mask in candidates[r * n:(r + 1) * n]:
+            if mask & (mask - 1) == 0:
+                row.append(symbols[mask.bit_length() - 1])
+            else:
+                row.append("*")
+        grid.append(row)
+    return SudokuPuzzle(n, grid, puzzle._symbol_set)
+
+
+def propagation_solve(puzzle):
+    """
+    Return SudokuPuzzle puzzle with every position filled in so that it
+    is solved, or None if this is not possible.
+
+    Every row, column and subsquare's candidates are kept as bitmasks and
+    narrowed by naked and hidden singles; when that stalls, the search
+    branches on the position with the fewest candidates left.
+
+    @type puzzle: SudokuPuzzle
+    @rtype: SudokuPuzzle | None
+
+    >>> s = SudokuPuzzle(4, [["A", "*", "*", "*"], ["*", "*", "A", "*"], \
+    ["*", "A", "*", "*"], ["*", "*", "*", "A"]], {"A", "B", "C", "D"})
+    >>> print(propagation_solve(s))
+    AB|CD
+    CD|AB
+    -----
+    BA|DC
+    DC|BA
+    >>> propagation_solve(SudokuPuzzle(4, [["A", "A", "*", "*"], \
+    ["*", "*", "*", "*"], ["*", "*", "*", "*"], ["*", "*", "*", "*"]], \
+    {"A", "B", "C", "D"})) is None
+    True
+    """
+    candidates, symbols = _initial_candidates(puzzle)
+    stack = [] if candidates is None else [candidates]
+    while stack:
+        candidates = stack.pop()
+
+        # minimum remaining values: the open cell with fewest candidates
+        best, best_count = None, None
+        for cell in range(len(candidates)):
+            mask = candidates[cell]
+            if mask & (mask - 1):
+                count = bin(mask).count("1")
+                if best is None or count < best_count:
+                    best, best_count = cell, count
+                    if count == 2:
+                        break
+        if best is None:
+            return _to_puzzle(puzzle, candidates, symbols)
+
+        # push in reverse so the lowest symbol is tried first
+        for bit in reversed(_bits(candidates[best])):
+            guess = candidates[:]
+            if _propagate(guess, [(best, other) for other in
+                                  _bits(candidates[best] & ~bit)],
+                          puzzle._n):
+                stack.append(guess)
+    return None
+
+
+# an exact-cover solver using Knuth's dancing links: every placement of
+# a symbol at a position is a row covering four constraint columns (the
+# position, and the symbol in that row, column and subsquare), and the
+# links of the sparse matrix live in flat lists indexed by node
+class _DancingLinks:
+    # Exact-cover matrix of nxn Sudoku, with node 0 the root header,
+    # nodes 1..4n^2 the column headers and the rest one node per
+    # (placement, constraint).
+    #
+    # === Attributes ===
+    # @type left, right, up, down: list[int]
+    #     links of each node
+    # @type column: list[int]
+    #     column header of each node
+    # @type size: list[int]
+    #     number of nodes left in each column, indexed by header
+    # @type placement: list[(int, int, int)]
+    #     (row, column, symbol index) of each node's placement
+    # @type first: dict[(int, int, int), int]
+    #     first node of each placement
+
+    def __init__(self, n):
+        # Create the full matrix for an nxn Sudoku.
+        #
+        # @type n: int
+        # @rtype: None
+        ss = round(n ** (1 / 2))
+        headers = 4 * n * n
+        self.left = [i - 1 for i in range(headers + 1)]
+        self.left[0] = headers
+        self.right = [i + 1 for i in range(headers + 1)]
+        self.right[headers] = 0
+        self.up = list(range(headers + 1))
+        self.down = list(range(headers + 1))
+        self.column = list(range(headers + 1))
+        self.size = [0] * (headers + 1)
+        self.placement = [None] * (headers + 1)
+        self.first = {}
+        for r in range(n):
+            for c in range(n):
+                b = (r // ss) * ss + c // ss
+                for v in range(n):
+                    columns = (1 + r * n + c, 1 + n * n + r * n + v,
+                               1 + 2 * n * n + c * n + v,
+                               1 + 3 * n * n + b * n + v)
+                    start = len(self.column)
+                    for k in range(4):
+                        node, col = start + k, columns[k]
+                        self.left.append(start + (k - 1) % 4)
+                        self.right.append(start + (k + 1) % 4)
+                        self.up.append(self.up[col])
+                        self.down.append(col)
+                        self.down[self.up[col]] = node
+                        self.up[col] = node
+                        self.column.append(col)
+                        self.placement.append((r, c, v))
+                        self.size[col] += 1
+                    self.first[(r, c, v)] = start
+
+    def cover(self, col):
+        # Remove column col and every row with a node in it.
+        left, right, up, down = self.left, self.right, self.up, self.down
+        right[left[col]], left[right[col]] = right[col], left[col]
+        i = down[col]
+        while i != col:
+            j = right[i]
+            while j != i:
+                down[up[j]], up[down[j]] = down[j], up[j]
+                self.size[self.column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, col):
+        # Undo cover(col).
+        left, right, up, down = self.left, self.right, self.up, self.down
+        i = up[col]
+        while i != col:
+            j = left[i]
+            while j != i:
+                self.size[self.column[j]] += 1
+                down[up[j]], up[down[j]] = j, j
+                j = left[j]
+            i = up[i]
+        right[left[col]], left[right[col]] = col, col
+
+    def select(self, node):
+        # Cover the columns of node's row, other than node's own.
+        j = self.right[node]
+        while j != node:
+            self.cover(self.column[j])
+            j = self.right[j]
+
+    def unselect(self, node):
+        # Undo select(node).
+        j = self.left[node]
+        while j != node:
+            self.uncover(self.column[j])
+            j = self.left[j]
+
+
+def _exact_cover(puzzle, limit):
+    # Return the number of solutions of SudokuPuzzle puzzle, counting no
+    # further than limit, and the (row, column, symbol index) placements
+    # of the first solution found, or None if there is none.
+    #
+    # @type puzzle: SudokuPuzzle
+    # @type limit: int
+    # @rtype: (int, list[(int, int, int)] | None)
+    if not puzzle._consistent:
+        return 0, None
+    n, dl = puzzle._n, _DancingLinks(puzzle._n)
+    symbols = sorted(puzzle._symbol_set)
+    for r in range(n):
+        for c in range(n):
+            if puzzle._symbols[r][c] != "*":
+                node = dl.first[(r, c, symbols.index(puzzle._symbols[r][c]))]
+                dl.cover(dl.column[node])
+                dl.select(node)
+
+    count, first, chosen = 0, None, []
+    forward = True
+    while True:
+        if forward:
+            if dl.right[0] == 0:
+                # every constraint met
+                count += 1
+                if first is None:
+                    first = [dl.placement[node] for node in chosen]
+                if count >= limit:
+                    break
+                forward = False
+                continue
+            # branch on the column with fewest rows left
+            col, j = dl.right[0], dl.right[0]
+            while j != 0:
+                if dl.size[j] < dl.size[col]:
+                    col = j
+                j = dl.right[j]
+            dl.cover(col)
+            node = dl.down[col]
+            if node == col:
+                dl.uncover(col)
+                forward = False
+                continue
+            chosen.append(node)
+            dl.select(node)
+        else:
+            # backtrack to the next row of the latest column chosen
+            if len(chosen) == 0:
+                break
+            node = chosen.pop()
+            dl.unselect(node)
+            col, node = dl.column[node], dl.down[node]
+            if node == col:
+                dl.uncover(col)
+                continue
+            chosen.append(node)
+            dl.select(node)
+            forward = True
+    return count, first
+
+
+def dlx_solve(puzzle):
+    """
+    Return SudokuPuzzle puzzle with every position filled in so that it
+    is solved, or None if this is not possible.
+
+    @type puzzle: SudokuPuzzle
+    @rtype: SudokuPuzzle | None
+
+    >>> s = SudokuPuzzle(4, [["A", "*", "*", "*"], ["*", "*", "A", "*"], \
+    ["*", "A", "*", "*"], ["*", "*", "*", "A"]], {"A", "B", "C", "D"})
+    >>> dlx_solve(s).is_solved()
+    True
+    """
+    solution = exact_cover_solve(puzzle)
+    return None if solution is None else solution.puzzle
+
+
+def count_solutions(puzzle, limit=2):
+    """
+    Return the number of ways SudokuPuzzle puzzle can be solved, counting
+    no further than limit.  The default limit is enough to tell whether
+    the solution is unique.
+
+    @type puzzle: SudokuPuzzle
+    @type limit: int
+    @rtype: int
+
+    >>> s = SudokuPuzzle(4, [["A", "*", "*", "*"], ["*", "*", "A", "*"], \
+    ["*", "A", "*", "*"], ["*", "*", "*", "A"]], {"A", "B", "C", "D"})
+    >>> count_solutions(s, 100)
+    18
+    >>> count_solutions(s)
+    2
+    """
+    return _exact_cover(puzzle, limit)[0]
+
+
+def exact_cover_solve(puzzle):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child containing an extension of the puzzle
+    in its parent. Return None if this is not possible.
+
+    A drop-in for depth_first_solve on SudokuPuzzles that finds the
+    solution by exact cover with dancing links.
+
+    @type puzzle: SudokuPuzzle
+    @rtype: PuzzleNode
+    """
+    placements = _exact_cover(puzzle, 1)[1]
+    if placements is None:
+        return None
+    symbols = sorted(puzzle._symbol_set)
+    placed = {(r, c): symbols[v] for (r, c, v) in placements}
+
+    # fill the empty positions in the order extensions would
+    current = PuzzleNode(puzzle, [])
+    for r in range(puzzle._n):
+        for c in range(puzzle._n):
+            if puzzle._symbols[r][c] == "*":
+                extension = current.puzzle._extend(r, c, placed[(r, c)])
+                newNode = PuzzleNode(extension, [], current)
+                current.children.append(newNode)
+                current = newNode
+    return current
+
+
 if __name__ == "__main__":
     import doctest
 
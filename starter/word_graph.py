@@ -0,0 +1,309 @@
+"""
+An index of the one-character changes between words, for word ladders
+"""
+from functools import lru_cache
+import json
+import os
+
+
+class WordGraph:
+    """
+    Words grouped under wildcard patterns, such as "s_me" for "same"
+    and "some", so the words one character change away from a word
+    are found with a few dictionary lookups.
+
+    A word is only filed under a pattern when the character the
+    wildcard replaces is a lowercase letter, matching the changes
+    WordLadderPuzzle may make.
+    """
+
+    def __init__(self, words, chars="abcdefghijklmnopqrstuvwxyz"):
+        """
+        Create a new WordGraph self indexing words.
+
+        @type self: WordGraph
+        @type words: iterable[str]
+        @type chars: str
+        @rtype: None
+
+        >>> g = WordGraph(["same", "some", "sane", "Same"])
+        >>> sorted(g._buckets["s_me"])
+        ['same', 'some']
+        """
+        self._words = set(words)
+        self._buckets = {}
+        for word in self._words:
+            for i in range(len(word)):
+                if word[i] in chars:
+                    pattern = word[:i] + "_" + word[i + 1:]
+                    self._buckets.setdefault(pattern, []).append(word)
+
+    def __contains__(self, word):
+        """
+        Return whether word is in WordGraph self.
+
+        @type self: WordGraph
+        @type word: str
+        @rtype: bool
+
+        >>> "same" in WordGraph(["same"])
+        True
+        """
+        return word in self._words
+
+    def __len__(self):
+        """
+        Return the number of words in WordGraph self.
+
+        @type self: WordGraph
+        @rtype: int
+
+        >>> len(WordGraph(["same", "some"]))
+        2
+        """
+        return len(self._words)
+
+    def __iter__(self):
+        """
+        Return an iterator over the words in WordGraph self.
+
+        @type self: WordGraph
+        @rtype: iterator[str]
+        """
+        return iter(self._words)
+
+    def neighbours(self, word):
+        """
+        Return the words in WordGraph self that differ from word in
+        exactly one position, by a lowercase letter.
+
+        word itself need not be in self.
+
+        @type self: WordGraph
+        @type word: str
+        @rtype: list[str]
+
+        >>> g = WordGraph(["same", "some", "sane", "cost"])
+        >>> sorted(g.neighbours("same"))
+        ['sane', 'some']
+        """
+        neighbours = []
+        for i in range(len(word)):
+            for other in self._buckets.get(word[:i] + "_" + word[i + 1:],
+                                           ()):
+                if other != word:
+                    neighbours.append(other)
+        return neighbours
+
+
+class WordComponents:
+    """
+    The words that can reach one another by word ladder, ignoring which
+    way the changes go, labelled with a number per group.
+
+    Two words with different labels, or of different lengths, are never
+    on one ladder.  A change may only be to a lowercase letter, but a
+    word is grouped with any word it differs from in one position if
+    either changes to the other.
+    """
+
+    def __init__(self, words, chars="abcdefghijklmnopqrstuvwxyz",
+                 labels=None):
+        """
+        Create a new WordComponents self grouping words, which may only
+        change to chars, or holding labels if given, as made by
+        another WordComponents.
+
+        @type self: WordComponents
+        @type words: iterable[str]
+        @type chars: str
+        @type labels: dict[str, int] | None
+        @rtype: None
+
+        >>> c = WordComponents(["cat", "cot", "pig", "Big", "Bog"])
+        >>> c.label("cat") == c.label("cot"), c.label("cat") == c.label("pig")
+        (True, False)
+        >>> c.label("Bog") == c.label("Big") == c.label("pig")
+        True
+        """
+        if labels is not None:
+            self._labels = labels
+            return
+        self._labels = {}
+        # union-find over the words of one length at a time
+        byLength = {}
+        for word in words:
+            byLength.setdefault(len(word), []).append(word)
+        for length in sorted(byLength):
+            group = byLength[length]
+            parent = list(range(len(group)))
+
+            def find(x):
+                while parent[x] != x:
+                    parent[x] = parent[parent[x]]
+                    x = parent[x]
+                return x
+
+            for i in range(length):
+                # the words matching each pattern, and whether any of
+                # them has a char the others could change to there
+                patterns = {}
+                for index in range(len(group)):
+                    word = group[index]
+                    pattern = word[:i] + word[i + 1:]
+                    entry = patterns.get(pattern)
+                    if entry is None:
+                        patterns[pattern] = [[index], word[i] in chars]
+                    else:
+                        entry[0].append(index)
+                        entry[1] = entry[1] or word[i] in chars
+                for indices, changeable in patterns.values():
+                    if changeable and len(indices) > 1:
+                        root = find(indices[0])
+                        for index in indices[1:]:
+                            other = find(index)
+                            if other != root:
+                                parent[other] = root
+
+            base = len(self._labels)
+            roots = {}
+            for index in range(len(group)):
+                root = roots.setdefault(find(index), base + len(roots))
+                self._labels[group[index]] = root
+
+    def __contains__(self, word):
+        """
+        Return whether word is labelled in WordComponents self.
+
+        @type self: WordComponents
+        @type word: str
+        @rtype: bool
+
+        >>> "cat" in WordComponents(["cat"])
+        True
+        """
+        return word in self._labels
+
+    def label(self, word):
+        """
+        Return the label of the group of word in WordComponents self,
+        or None if word is not in self.
+
+        @type self: WordComponents
+        @type word: str
+        @rtype: int | None
+
+        >>> WordComponents(["cat"]).label("dog") is None
+        True
+        """
+        return self._labels.get(word)
+
+    def separated(self, word, other):
+        """
+        Return whether WordComponents self shows that there is no word
+        ladder between word and other: they are both in self but in
+        different groups.
+
+        @type self: WordComponents
+        @type word: str
+        @type other: str
+        @rtype: bool
+
+        >>> c = WordComponents(["cat", "cot", "dog"])
+        >>> c.separated("cat", "cot"), c.separated("cat", "dog")
+        (False, True)
+        >>> c.separated("cat", "pig")
+        False
+        """
+        label = self._labels.get(word)
+        otherLabel = self._labels.get(other)
+        return (label is not None and otherLabel is not None and
+                label != otherLabel)
+
+    def save(self, path):
+        """
+        Write the labels of WordComponents self to the file at path as
+        JSON, for load_word_components.
+
+        @type self: WordComponents
+        @type path: str
+        @rtype: None
+        """
+        with open(path, "w") as f:
+            json.dump({"word_components": 1, "labels": self._labels}, f,
+                      separators=(",", ":"))
+
+
+def load_word_components(path):
+    """
+    Return the WordComponents saved to the file at path.
+
+    @type path: str
+    @rtype: WordComponents
+
+    >>> import os, tempfile
+    >>> c = WordComponents(["cat", "cot", "dog"])
+    >>> fd, path = tempfile.mkstemp()
+    >>> os.close(fd)
+    >>> c.save(path)
+    >>> load_word_components(path).separated("cat", "dog")
+    True
+    >>> os.remove(path)
+    """
+    with open(path, "r") as f:
+        saved = json.load(f)
+    if saved.get("word_components") != 1:
+        raise ValueError("{} does not hold saved WordComponents".format(path))
+    return WordComponents((), labels=saved["labels"])
+
+
+def load_words(path="words", length=None):
+    """
+    Return the whitespace-separated words in the file at path that are
+    length characters long, or all of them if length is None.
+
+    The file is read a line at a time, keeping only the words wanted,
+    and each result is cached under the file's absolute path, so
+    puzzles built one after another share a single read of the file.
+
+    @type path: str
+    @type length: int | None
+    @rtype: frozenset[str]
+
+    >>> words = load_words(length=4)
+    >>> "same" in words, "some" in words, "stone" in words
+    (True, True, False)
+    >>> load_words(os.path.abspath("words"), 4) is words
+    True
+    """
+    return _read_words(os.path.abspath(path), length)
+
+
+@lru_cache(maxsize=None)
+def _read_words(path, length):
+    # Return the words load_words(path, length) returns, for an absolute
+    # path.
+    #
+    # @type path: str
+    # @type length: int | None
+    # @rtype: frozenset[str]
+    with open(path, "r") as lines:
+        return frozenset([word for line in lines for word in line.split()
+                          if length is None or len(word) == length])
+
+
+def load_word_graph(path="words", length=None):
+    """
+    Return a WordGraph of the whitespace-separated words in the file
+    at path, only those length characters long unless length is None.
+
+    @type path: str
+    @type length: int | None
+    @rtype: WordGraph
+    """
+    return WordGraph(load_words(path, length))
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
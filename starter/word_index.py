@@ -0,0 +1,263 @@
+"""
+A compiled word-ladder graph in one binary file, read through mmap so
+that loading it is quick and every process shares its pages
+"""
+from word_graph import WordGraph
+from array import array
+from functools import lru_cache
+import mmap
+import os
+import struct
+import sys
+
+# magic, version, byte order (0 little, 1 big), chars length,
+# number of words, number of edges, number of word lengths
+_HEADER = struct.Struct("<4sIIIIII")
+_MAGIC = b"WLIX"
+_VERSION = 1
+# each word length: the length, first word id, number of words
+_PARTITION = struct.Struct("<III")
+
+
+def compile_word_index(words, path, chars="abcdefghijklmnopqrstuvwxyz"):
+    """
+    Write a WordIndex of words, which may only change to chars, to the
+    file at path.
+
+    The file holds, after a header, the word lengths with the range of
+    ids of the words of each length, then the offsets of each word in
+    the text of all words and of its neighbours among the neighbour
+    ids (CSR arrays), then the neighbour ids, then the words as UTF-8.
+    Words are numbered in order of length and then of their UTF-8, so
+    each length is one sorted range.
+
+    @type words: iterable[str]
+    @type path: str
+    @type chars: str
+    @rtype: None
+    """
+    graph = WordGraph(words, chars)
+    ordered = sorted(graph, key=lambda word: (len(word),
+                                              word.encode("utf-8")))
+    ids = {ordered[i]: i for i in range(len(ordered))}
+
+    partitions = []
+    for i in range(len(ordered)):
+        if len(partitions) == 0 or partitions[-1][0] != len(ordered[i]):
+            partitions.append([len(ordered[i]), i, 0])
+        partitions[-1][2] += 1
+
+    text = bytearray()
+    wordOffsets, edgeOffsets, edges = array("I", [0]), array("I", [0]), \
+        array("I")
+    for word in ordered:
+        text += word.encode("utf-8")
+        wordOffsets.append(len(text))
+        edges.extend(sorted(ids[other] for other in graph.neighbours(word)))
+        edgeOffsets.append(len(edges))
+
+    encodedChars = chars.encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, sys.byteorder == "big",
+                             len(encodedChars), len(ordered), len(edges),
+                             len(partitions)))
+        for partition in partitions:
+            f.write(_PARTITION.pack(*partition))
+        f.write(encodedChars)
+        # pad so the arrays start 4-byte aligned
+        f.write(b"\0" * (-f.tell() % 4))
+        for numbers in (wordOffsets, edgeOffsets, edges):
+            numbers.tofile(f)
+        f.write(text)
+
+
+class WordIndex:
+    """
+    A word-ladder graph read straight from a file made by
+    compile_word_index, which stands in for a set of words or a
+    WordGraph as the word set of a WordLadderPuzzle.
+
+    Pickling a WordIndex only pickles its path, so sending one to
+    worker processes is cheap, and they map the same file.
+    """
+
+    def __init__(self, path):
+        """
+        Create a new WordIndex self of the file at path.
+
+        @type self: WordIndex
+        @type path: str
+        @rtype: None
+        """
+        self._path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, bigEndian, charsLength, words, edges,
+         lengths) = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("{} is not a word index".format(path))
+        if bigEndian != (sys.byteorder == "big") or \
+                array("I").itemsize != 4:
+            raise ValueError("{} was compiled for another kind of machine"
+                             .format(path))
+
+        offset = _HEADER.size
+        # word length -> (first word id, number of words)
+        self._partitions = {}
+        for _ in range(lengths):
+            length, first, count = _PARTITION.unpack_from(self._map, offset)
+            self._partitions[length] = (first, count)
+            offset += _PARTITION.size
+        self._chars = self._map[offset:offset + charsLength].decode("utf-8")
+        offset += charsLength
+        offset += -offset % 4
+
+        view = memoryview(self._map)
+        self._wordOffsets = view[offset:offset + 4 * (words + 1)].cast("I")
+        offset += 4 * (words + 1)
+        self._edgeOffsets = view[offset:offset + 4 * (words + 1)].cast("I")
+        offset += 4 * (words + 1)
+        self._edges = view[offset:offset + 4 * edges].cast("I")
+        self._text = offset + 4 * edges
+
+    def __reduce__(self):
+        """
+        Return how to pickle WordIndex self: by loading its path again.
+
+        @type self: WordIndex
+        @rtype: tuple
+        """
+        return load_word_index, (self._path,)
+
+    def __len__(self):
+        """
+        Return the number of words in WordIndex self.
+
+        @type self: WordIndex
+        @rtype: int
+        """
+        return len(self._wordOffsets) - 1
+
+    def __iter__(self):
+        """
+        Yield the words in WordIndex self.
+
+        @type self: WordIndex
+        @rtype: iterator[str]
+        """
+        for i in range(len(self)):
+            yield self._word(i)
+
+    def __contains__(self, word):
+        """
+        Return whether word is in WordIndex self.
+
+        @type self: WordIndex
+        @type word: str
+        @rtype: bool
+        """
+        return self._id(word) is not None
+
+    def neighbours(self, word):
+        """
+        Return the words in WordIndex self that word can change to in
+        one step: those differing from it in exactly one position, by
+        one of the chars it was compiled with.
+
+        word itself need not be in self.
+
+        @type self: WordIndex
+        @type word: str
+        @rtype: list[str]
+        """
+        i = self._id(word)
+        if i is None:
+            neighbours = []
+            for letter in range(len(word)):
+                for char in self._chars:
+                    newWord = word[:letter] + char + word[letter + 1:]
+                    if newWord != word and newWord in self:
+                        neighbours.append(newWord)
+            return neighbours
+        edges = self._edges
+        return [self._word(edges[j])
+                for j in range(self._edgeOffsets[i],
+                               self._edgeOffsets[i + 1])]
+
+    def _word(self, i):
+        # Return the word with id i.
+        #
+        # @type self: WordIndex
+        # @type i: int
+        # @rtype: str
+        return self._map[self._text + self._wordOffsets[i]:
+                         self._text + self._wordOffsets[i + 1]].decode("utf-8")
+
+    def _id(self, word):
+        # Return the id of word, or None if it is not in self, by binary
+        # search among the words of its length.
+        #
+        # @type self: WordIndex
+        # @type word: str
+        # @rtype: int | None
+        if len(word) not in self._partitions:
+            return None
+        low, count = self._partitions[len(word)]
+        high = low + count
+        key = word.encode("utf-8")
+        offsets, text, words = self._wordOffsets, self._text, self._map
+        while low < high:
+            middle = (low + high) // 2
+            found = words[text + offsets[middle]:text + offsets[middle + 1]]
+            if found < key:
+                low = middle + 1
+            elif found > key:
+                high = middle
+            else:
+                return middle
+        return None
+
+
+def load_word_index(path):
+    """
+    Return the WordIndex of the file at path, made by
+    compile_word_index.  Each process maps a file only once, however
+    its path is written.
+
+    @type path: str
+    @rtype: WordIndex
+
+    >>> import os, tempfile
+    >>> fd, path = tempfile.mkstemp()
+    >>> os.close(fd)
+    >>> compile_word_index(["same", "some", "sane", "cost", "Same"], path)
+    >>> index = load_word_index(path)
+    >>> sorted(index.neighbours("same")), len(index), "Same" in index
+    (['sane', 'some'], 5, True)
+    >>> index.neighbours("Same"), index.neighbours("sine")
+    (['same'], ['sane'])
+    >>> import pickle
+    >>> pickle.loads(pickle.dumps(index)) is index
+    True
+    >>> load_word_index(os.path.relpath(path)) is index
+    True
+    >>> del index
+    >>> _open_word_index.cache_clear()
+    >>> os.remove(path)
+    """
+    return _open_word_index(os.path.abspath(path))
+
+
+@lru_cache(maxsize=None)
+def _open_word_index(path):
+    # Return the WordIndex load_word_index(path) returns, for an
+    # absolute path.
+    #
+    # @type path: str
+    # @rtype: WordIndex
+    return WordIndex(path)
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
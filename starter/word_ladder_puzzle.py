@@ -1,4 +1,5 @@
 from puzzle import Puzzle
+from puzzle_tools import PuzzleNode
 
 
 class WordLadderPuzzle(Puzzle):
@@ -6,19 +7,26 @@ class WordLadderPuzzle(Puzzle):
     A word-ladder puzzle that may be solved, unsolved, or even unsolvable.
     """
 
-    def __init__(self, from_word, to_word, ws):
+    def __init__(self, from_word, to_word, ws, components=None):
         """
         Create a new word-ladder puzzle with the aim of stepping
         from from_word to to_word using words in ws, changing one
         character at each step.
 
+        ws may be a WordGraph or WordIndex, which many puzzles can
+        share, so that the next words are looked up instead of
+        generated.  Likewise components may be the WordComponents of
+        ws, so that fail_fast can tell when to_word is out of reach.
+
         @type from_word: str
         @type to_word: str
-        @type ws: set[str]
+        @type ws: set[str] | WordGraph | WordIndex
+        @type components: WordComponents | None
         @rtype: None
         """
         (self._from_word, self._to_word, self._word_set) = (from_word,
                                                             to_word, ws)
+        self._components = components
         # set of characters to use for 1-character changes
         self._chars = "abcdefghijklmnopqrstuvwxyz"
 
@@ -36,18 +44,48 @@ class WordLadderPuzzle(Puzzle):
         return sameFromWord and sameToWord
 
 
+    def state_key(self):
+        
+        '''() -> str
+        
+        This function returns the current word, which is
+        all that tells two puzzles apart within one search
+        towards to_word.
+        '''
+        return self._from_word
+
+
     def extensions(self):
         
-        '''set(str) -> list[Puzzle Objects]
+        '''set(str) -> generator[Puzzle Objects]
         
-        This function returns a list of the possible 
-        solutions for the word.
+        This function yields the possible solutions
+        for the word, each built only when asked for.
         '''
-        # setting up variables
-        extensions = []
-        word = self._from_word
+        # cleaner naming
+        to_word, ws, components = (self._to_word, self._word_set,
+                                   self._components)
+
+        # create all extensions via new puzzle objects which
+        # incorporate the new words constructed
+        for newWord in self._next_words(self._from_word):
+            yield WordLadderPuzzle(newWord, to_word, ws, components)
 
-        # loops by the number of letters in from_word
+
+    def _next_words(self, word):
+        
+        '''str -> list[str]
+        
+        This helper function returns the words in the word set
+        that differ from word in exactly one character.
+        '''
+        # a WordGraph has them indexed already
+        if hasattr(self._word_set, "neighbours"):
+            return self._word_set.neighbours(word)
+
+        words = []
+
+        # loops by the number of letters in word
         for letter in range(len(word)):
             # loops through the alphabet
             for char in self._chars:
@@ -59,14 +97,32 @@ class WordLadderPuzzle(Puzzle):
 
                 # has to have contructed a NEW word in word set
                 if newWord != word and newWord in self._word_set:
-                    # cleaner naming
-                    to_word, ws = self._to_word, self._word_set
-                    # create all extensions via new puzzle objects which
-                    # incorporate the new word constructed
-                    extension = WordLadderPuzzle(newWord, to_word, ws)
-                    extensions.append(extension)
+                    words.append(newWord)
 
-        return extensions
+        return words
+
+
+    def fail_fast(self):
+        
+        '''() -> Bool
+        
+        This function checks to see if the objective word is known
+        to be out of reach: it has a different length, or the
+        puzzle's WordComponents put it in another group.
+        
+        >>> from word_graph import WordComponents
+        >>> ws = {"cat", "cot", "pig"}
+        >>> WordLadderPuzzle("cat", "pig", ws).fail_fast()
+        False
+        >>> WordLadderPuzzle("cat", "pig", ws, WordComponents(ws)).fail_fast()
+        True
+        >>> WordLadderPuzzle("cat", "cots", ws).fail_fast()
+        True
+        '''
+        if len(self._from_word) != len(self._to_word):
+            return True
+        return (self._components is not None and
+                self._components.separated(self._from_word, self._to_word))
 
 
     def is_solved(self):
@@ -84,6 +140,147 @@ class WordLadderPuzzle(Puzzle):
         '''
         return self._from_word == self._to_word
 
+
+def hamming_distance(puzzle):
+    
+    '''WordLadderPuzzle -> int
+    
+    This function returns the number of places where the current
+    word and the objective word differ, counting each place only
+    one of them has. Each step changes one character, so this
+    never overestimates the steps left.
+    
+    >>> hamming_distance(WordLadderPuzzle("same", "cost", {"same"}))
+    4
+    >>> hamming_distance(WordLadderPuzzle("cats", "cot", {"cats"}))
+    2
+    '''
+    word, to_word = puzzle._from_word, puzzle._to_word
+    return (sum(1 for a, b in zip(word, to_word) if a != b) +
+            abs(len(word) - len(to_word)))
+
+
+def _previous_words(puzzle, word):
+    
+    '''(WordLadderPuzzle, str) -> list[str]
+    
+    This helper function returns the words in the word set that
+    could have changed into word on a ladder from the current word.
+    A change is only ever to one of the puzzle's characters, so the
+    other characters of such words all come from the current word.
+    
+    >>> p = WordLadderPuzzle("Mars", "bats", {"Mars", "mars", "bars"})
+    >>> sorted(_previous_words(p, "bars"))
+    ['Mars', 'mars']
+    >>> _previous_words(p, "Mars")
+    []
+    '''
+    from_word, chars = puzzle._from_word, puzzle._chars
+    words = []
+    for newWord in puzzle._next_words(word):
+        # the one position they differ at
+        i = 0
+        while newWord[i] == word[i]:
+            i += 1
+        if word[i] in chars:
+            words.append(newWord)
+    if len(from_word) == len(word):
+        for i in range(len(word)):
+            if word[i] in chars and from_word[i] not in chars:
+                newWord = word[:i] + from_word[i] + word[i + 1:]
+                if newWord in puzzle._word_set:
+                    words.append(newWord)
+    return words
+
+
+def bidirectional_solve(puzzle):
+    
+    '''WordLadderPuzzle -> PuzzleNode
+    
+    This function returns a shortest ladder from the current word
+    to the objective word as a path of PuzzleNodes ending in the
+    solved puzzle, or None if there is none. It searches outwards
+    from both words one level at a time, always growing the smaller
+    frontier, and stitches the two halves together where they meet.
+    Changes only go one way when they are to or from a character the
+    puzzle cannot change to, so the search back from the objective
+    word follows changes backwards.
+    
+    >>> ws = {"cat", "cot", "cog", "dog", "cut"}
+    >>> sol = bidirectional_solve(WordLadderPuzzle("cat", "dog", ws))
+    >>> path = []
+    >>> while sol:
+    ...     path.append(sol.puzzle.state_key())
+    ...     sol = sol.parent
+    >>> path[::-1]
+    ['cat', 'cot', 'cog', 'dog']
+    >>> bidirectional_solve(WordLadderPuzzle("cat", "dox", ws)) is None
+    True
+    '''
+    if puzzle.fail_fast():
+        return None
+    from_word, to_word = puzzle._from_word, puzzle._to_word
+    # every step lands on a word in the word set, the last one included
+    if from_word != to_word and to_word not in puzzle._word_set:
+        return None
+    # word each reached word was reached from, on either side
+    forward, backward = {from_word: None}, {to_word: None}
+    forward_frontier, backward_frontier = [from_word], [to_word]
+    meeting = from_word if from_word == to_word else None
+
+    while meeting is None and forward_frontier and backward_frontier:
+
+        # grow the smaller side by one whole level
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parents, others = forward_frontier, forward, backward
+        else:
+            frontier, parents, others = backward_frontier, backward, forward
+        nextFrontier = []
+        for word in frontier:
+            if parents is forward:
+                newWords = puzzle._next_words(word)
+            else:
+                newWords = _previous_words(puzzle, word)
+            for newWord in newWords:
+                if newWord not in parents:
+                    parents[newWord] = word
+                    nextFrontier.append(newWord)
+                    if newWord in others:
+                        meeting = newWord
+                        break
+            if meeting is not None:
+                break
+
+        if parents is forward:
+            forward_frontier = nextFrontier
+        else:
+            backward_frontier = nextFrontier
+
+    if meeting is None:
+        return None
+
+    # from_word ... meeting, then the words after meeting up to to_word
+    words = []
+    word = meeting
+    while word is not None:
+        words.append(word)
+        word = forward[word]
+    words.reverse()
+    word = backward[meeting]
+    while word is not None:
+        words.append(word)
+        word = backward[word]
+
+    current = PuzzleNode(puzzle, [])
+    for word in words[1:]:
+        extension = WordLadderPuzzle(word, to_word, puzzle._word_set,
+                                     puzzle._components)
+        newNode = PuzzleNode(extension, [], current)
+        current.children.append(newNode)
+        current = newNode
+    return current
+
+
 '''
 if __name__ == '__main__':
     import doctest